@@ -0,0 +1,250 @@
+"""
+Benchmark git_stats.py against synthetic repositories of controlled size.
+
+Each case (mode x --type) runs in a fresh interpreter so wall time, git subprocess
+count and peak RSS are measured in isolation. Repos are generated locally with
+`git fast-import`, so no network access is needed.
+
+    python bench_git_stats.py --files 5000 --depth 4 --commits 1000 -o bench.json
+    python bench_git_stats.py --files 5000 --compare bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+
+MODES = ["git", "file"]
+TYPES = ["files", "dirs", "both"]
+
+
+def synthetic_path(index: int, depth: int, fanout: int) -> str:
+    """Spread files over a tree `depth` directories deep with `fanout` children per level."""
+    parts = [f"d{level}_{(index // fanout ** level) % fanout}" for level in range(depth)]
+    return "/".join(parts + [f"file_{index}.{('py', 'js', 'md', 'txt')[index % 4]}"])
+
+
+def _blob(data: str) -> str:
+    encoded = data.encode()
+    return f"data {len(encoded)}\n{data}\n"
+
+
+def generate_repo(
+    repo_dir: str,
+    files: int,
+    depth: int,
+    commits: int,
+    fanout: int = 8,
+    files_per_commit: int = 5,
+    untracked: int = 0,
+    ignored: int = 0,
+    seed: int = 0,
+    start_ts: int = 1_600_000_000
+) -> None:
+    """Create a repo with `files` tracked files and `commits` commits, plus optional noise."""
+    rng = random.Random(seed)
+    paths = [synthetic_path(i, depth, fanout) for i in range(files)]
+
+    os.makedirs(repo_dir, exist_ok=True)
+    subprocess.run(["git", "init", "-q", repo_dir], check=True)
+    subprocess.run(["git", "-C", repo_dir, "symbolic-ref", "HEAD", "refs/heads/main"], check=True)
+
+    proc = subprocess.Popen(
+        ["git", "-C", repo_dir, "fast-import", "--quiet"], stdin=subprocess.PIPE, text=True
+    )
+    for n in range(1, max(commits, 1) + 1):
+        ts = start_ts + n * 3600
+        changed = paths if n == 1 else rng.sample(paths, min(files_per_commit, len(paths)))
+        if n == 1:
+            changed = changed + [".gitignore"]
+        lines = [
+            "commit refs/heads/main",
+            f"mark :{n}",
+            f"committer Bench <bench@example.com> {ts} +0000",
+            _blob(f"commit {n}").rstrip("\n"),
+        ]
+        if n > 1:
+            lines.append(f"from :{n - 1}")
+        for path in changed:
+            content = "build/\n" if path == ".gitignore" else f"{path} @ {n}\n"
+            lines.append(f"M 100644 inline {path}")
+            lines.append(_blob(content).rstrip("\n"))
+        proc.stdin.write("\n".join(lines) + "\n\n")
+    proc.stdin.close()
+    if proc.wait() != 0:
+        raise RuntimeError("git fast-import failed")
+    subprocess.run(["git", "-C", repo_dir, "checkout", "-q", "-f", "main"], check=True)
+
+    for i in range(untracked):
+        path = os.path.join(repo_dir, "scratch", f"untracked_{i}.txt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("untracked\n")
+    for i in range(ignored):
+        path = os.path.join(repo_dir, "build", f"out_{i % 50}", f"ignored_{i}.o")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("ignored\n")
+
+
+def run_case(repo_dir: str, mode: str, type_filter: str) -> Dict:
+    """Run one scan in this process and report its metrics (called in a fresh interpreter)."""
+    git_calls = 0
+    original_init = subprocess.Popen.__init__
+
+    def counting_init(self, args, *a, **kw):
+        nonlocal git_calls
+        argv0 = args if isinstance(args, str) else args[0]
+        if os.path.basename(str(argv0)) == "git":
+            git_calls += 1
+        original_init(self, args, *a, **kw)
+
+    subprocess.Popen.__init__ = counting_init
+
+    import git_stats
+
+    start = time.perf_counter()
+    results, _ = git_stats.get_last_commit_dates_optimized(
+        repo_dir,
+        mode="auto" if mode == "git" else "file",
+        type_filter=type_filter,
+        use_cache=False,
+        show_progress=False,
+    )
+    git_stats.filter_and_sort_results(results, sort_by="-updated_at")
+    wall_time = time.perf_counter() - start
+
+    return {
+        "wall_time": wall_time,
+        "git_subprocesses": git_calls,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1),
+        "items": len(results),
+    }
+
+
+def run_case_isolated(repo_dir: str, mode: str, type_filter: str) -> Dict:
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-case", repo_dir, mode, type_filter],
+        capture_output=True, text=True, check=False, cwd=here,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Case {mode}/{type_filter} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_benchmarks(repo_dir: str, modes: List[str], types: List[str], repeat: int) -> List[Dict]:
+    cases = []
+    for mode in modes:
+        for type_filter in types:
+            runs = [run_case_isolated(repo_dir, mode, type_filter) for _ in range(repeat)]
+            wall_times = [r["wall_time"] for r in runs]
+            case = {
+                "mode": mode,
+                "type": type_filter,
+                "wall_time_min": min(wall_times),
+                "wall_time_mean": sum(wall_times) / len(wall_times),
+                "git_subprocesses": runs[-1]["git_subprocesses"],
+                "peak_rss_kb": max(r["peak_rss_kb"] for r in runs),
+                "items": runs[-1]["items"],
+            }
+            cases.append(case)
+            print(
+                f"{mode:>4} {type_filter:>5}: {case['wall_time_min']:8.3f}s "
+                f"git={case['git_subprocesses']:<4d} rss={case['peak_rss_kb'] / 1024:7.1f}MB "
+                f"items={case['items']}"
+            )
+    return cases
+
+
+def print_comparison(cases: List[Dict], baseline_file: str) -> None:
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {(c["mode"], c["type"]): c for c in json.load(f)["cases"]}
+    print(f"\nCompared with {baseline_file}:")
+    for case in cases:
+        old = baseline.get((case["mode"], case["type"]))
+        if not old:
+            continue
+        speedup = old["wall_time_min"] / case["wall_time_min"] if case["wall_time_min"] else float("inf")
+        print(
+            f"{case['mode']:>4} {case['type']:>5}: {speedup:6.2f}x faster, "
+            f"git {old['git_subprocesses']} -> {case['git_subprocesses']}, "
+            f"rss {old['peak_rss_kb'] / 1024:.1f} -> {case['peak_rss_kb'] / 1024:.1f}MB"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark git_stats.py on synthetic repositories.")
+    parser.add_argument("--files", type=int, default=2000, help="Tracked files to generate")
+    parser.add_argument("--depth", type=int, default=3, help="Directory depth of the generated tree")
+    parser.add_argument("--fanout", type=int, default=8, help="Subdirectories per level")
+    parser.add_argument("--commits", type=int, default=200, help="Commits in the generated history")
+    parser.add_argument("--files-per-commit", type=int, default=5, help="Files touched by each later commit")
+    parser.add_argument("--untracked", type=int, default=0, help="Untracked files to add as noise")
+    parser.add_argument("--ignored", type=int, default=0, help="Ignored files (under build/) to add as noise")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes: git,file")
+    parser.add_argument("--types", default=",".join(TYPES), help="Comma-separated --type variants")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best time is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repo-dir", default=None, help="Reuse or keep the generated repo here")
+    parser.add_argument("-o", "--output", default="bench_git_stats_results.json", help="Results JSON file")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    config = {
+        "files": args.files, "depth": args.depth, "fanout": args.fanout, "commits": args.commits,
+        "files_per_commit": args.files_per_commit, "untracked": args.untracked, "ignored": args.ignored,
+        "seed": args.seed,
+    }
+
+    tmp_dir = None
+    repo_dir = args.repo_dir
+    if repo_dir is None:
+        tmp_dir = tempfile.mkdtemp(prefix="bench_git_stats_")
+        repo_dir = os.path.join(tmp_dir, "repo")
+    try:
+        if not os.path.isdir(os.path.join(repo_dir, ".git")):
+            start = time.perf_counter()
+            generate_repo(repo_dir, **config)
+            print(f"Generated {repo_dir} in {time.perf_counter() - start:.1f}s: {config}")
+
+        cases = run_benchmarks(
+            repo_dir,
+            [m.strip() for m in args.modes.split(",") if m.strip()],
+            [t.strip() for t in args.types.split(",") if t.strip()],
+            args.repeat,
+        )
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "git": subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip(),
+        "config": config,
+        "cases": cases,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark results saved to: {args.output}")
+
+    if args.compare:
+        print_comparison(cases, args.compare)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--run-case":
+        print(json.dumps(run_case(*sys.argv[2:5])))
+    else:
+        main()
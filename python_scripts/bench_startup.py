@@ -0,0 +1,103 @@
+"""
+Measure CLI startup time of git_stats.py and find_large_folders.py.
+
+Each case runs in a fresh interpreter; the reported time is the best of
+--repeat runs minus a bare `python -c pass`. The script also checks that
+importing each module leaves the heavy dependencies (GitPython, tqdm, jet,
+sqlite3, multiprocessing) unloaded, and exits non-zero when a budget is
+exceeded, so it can run in CI or a pre-commit hook.
+
+    python bench_startup.py --repeat 20 --max-ms 150 -o startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = ["git", "tqdm", "jet", "rich", "sqlite3", "multiprocessing"]
+
+CASES = {
+    "git_stats: import": ["-c", "import git_stats"],
+    "git_stats: --help": ["git_stats.py", "--help"],
+    "git_stats: query --help": ["git_stats.py", "query", "--help"],
+    "find_large_folders: import": ["-c", "import find_large_folders"],
+    "find_large_folders: --help": ["find_large_folders.py", "--help"],
+}
+
+IMPORT_CHECKS = ["git_stats", "find_large_folders"]
+
+
+def time_command(args: List[str], repeat: int) -> float:
+    """Best wall time in ms of `python <args>` over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args], cwd=HERE, check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def loaded_heavy_modules(module: str) -> List[str]:
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def run_benchmarks(repeat: int) -> Dict:
+    baseline = time_command(["-c", "pass"], repeat)
+    print(f"{'python -c pass':<30} {baseline:8.1f} ms (subtracted below)")
+    cases = []
+    for name, args in CASES.items():
+        elapsed = time_command(args, repeat) - baseline
+        cases.append({"case": name, "ms": elapsed})
+        print(f"{name:<30} {elapsed:8.1f} ms")
+
+    imports = {}
+    for module in IMPORT_CHECKS:
+        imports[module] = loaded_heavy_modules(module)
+        print(f"import {module:<23} heavy modules loaded: {', '.join(imports[module]) or 'none'}")
+    return {"baseline_ms": baseline, "cases": cases, "heavy_imports": imports}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark script startup time.")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per case (best time is reported)")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if any case takes longer than this (after subtracting interpreter startup)")
+    parser.add_argument("-o", "--output", default=None, help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.repeat)
+    report.update({
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    })
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBenchmark results saved to: {args.output}")
+
+    failures = [f"{module} imports {', '.join(mods)}" for module, mods in report["heavy_imports"].items() if mods]
+    if args.max_ms is not None:
+        failures += [f"{c['case']} took {c['ms']:.1f} ms" for c in report["cases"] if c["ms"] > args.max_ms]
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,30 @@
-from typing import Generator, List, Optional
+from typing import Dict, Generator, List, Optional
 import os
 import shutil
 import argparse
 import fnmatch
-from tqdm import tqdm
-from jet.file import traverse_directory
-from jet.file.utils import save_file
-from jet.logger import logger
+import hashlib
+import heapq
+import json
+import queue
+import threading
+import time
+
+
+class _LazyLogger:
+    """Stand-in for jet.logger.logger that imports it on first use."""
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            # Dunders and private probes (mock, copy, pickle, asyncio) must not trigger the import
+            raise AttributeError(name)
+        from jet.logger import logger as jet_logger
+
+        return getattr(jet_logger, name)
+
+
+# tqdm and jet are imported where they are used, so --help and imports stay fast
+logger = _LazyLogger()
 
 
 def match_patterns(file_path: str, patterns: List[str]) -> bool:
@@ -15,22 +33,419 @@ def match_patterns(file_path: str, patterns: List[str]) -> bool:
     return any(fnmatch.fnmatch(normalized_path, f"*{os.path.normpath(p).lower()}") for p in patterns)
 
 
-def get_size(file_path: str) -> int:
-    """Get the size of a file in bytes."""
-    return os.path.getsize(file_path)
+MB = 1024 * 1024  # Use 1024-based MB for consistency
 
+SIZE_CACHE_VERSION = 3
 
-def get_folder_sizes(folder_path: str) -> float:
-    """Calculate the total size of a folder in MB."""
-    total_size = 0
-    for root, _, files in os.walk(folder_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                total_size += get_size(file_path)
-            except FileNotFoundError:
+
+def default_size_cache_file(base_dir: str) -> str:
+    """Per-base_dir cache under the user's cache directory, never inside the scanned tree."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    key = hashlib.sha1(os.path.abspath(base_dir).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(cache_home, "find_large_folders", f"{key}.json")
+
+
+class FolderSizer:
+    """
+    du-style folder sizing: each directory is listed at most once per sizer,
+    and with a cache_file only again once its mtime, ctime or inode changes.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        allocated: bool = False,
+        cross_filesystems: bool = False,
+        cache_file: Optional[str] = None,
+        dev: Optional[int] = None,
+    ):
+        self.workers = max(1, workers)
+        self.allocated = allocated
+        self.cross_filesystems = cross_filesystems
+        self.dev = dev
+        self.sizes: Dict[str, int] = {}
+        # (st_dev << 64 | st_ino) of multi-link files already counted
+        self._links: set = set()
+        self.cache_file = cache_file
+        self._cache: Dict[str, tuple] = self._load_cache() if cache_file else {}
+        self._listed: Dict[str, tuple] = {}
+
+    def _load_cache(self) -> Dict[str, tuple]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != SIZE_CACHE_VERSION
+            or data.get("allocated") != self.allocated
+        ):
+            return {}
+        try:
+            return {
+                path: (int(mtime_ns), int(ctime_ns), int(ino), int(own),
+                       tuple((int(key), int(nbytes)) for key, nbytes in links),
+                       tuple((str(name), int(dev)) for name, dev in subdirs))
+                for path, (mtime_ns, ctime_ns, ino, own, links, subdirs) in data.get("dirs", {}).items()
+            }
+        except (AttributeError, TypeError, ValueError):
+            return {}
+
+    def forget(self, folder: str) -> None:
+        """Drop folder and everything below it from the cache saved by save_cache() (e.g. after deleting it)."""
+        folder = os.path.abspath(folder)
+        prefix = folder.rstrip(os.sep) + os.sep
+        for path in [p for p in self._listed if p == folder or p.startswith(prefix)]:
+            del self._listed[path]
+
+    def save_cache(self) -> None:
+        """Atomically write the summaries of the directories listed or validated by this sizer."""
+        if not self.cache_file:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": SIZE_CACHE_VERSION, "allocated": self.allocated, "dirs": self._listed},
+                f, separators=(",", ":"),
+            )
+        os.replace(tmp_file, self.cache_file)
+
+    def _device(self, folder: str) -> Optional[int]:
+        try:
+            return os.lstat(folder).st_dev
+        except OSError:
+            return None
+
+    def crosses_filesystem(self, folder: str) -> bool:
+        """Whether folder is on another device than dev (never with cross_filesystems or no dev)."""
+        if self.cross_filesystems or self.dev is None:
+            return False
+        folder_dev = self._device(folder)
+        return folder_dev is not None and folder_dev != self.dev
+
+    def size_of(self, folder: str) -> int:
+        """Total bytes under folder (0 for a folder on another filesystem)."""
+        folder = os.path.abspath(folder)
+        if folder not in self.sizes:
+            if self.crosses_filesystem(folder):
+                self.sizes[folder] = 0
+                return 0
+            dev = None
+            if not self.cross_filesystems:
+                dev = self.dev if self.dev is not None else self._device(folder)
+            # Multi-link files seen in this scan: inode key -> (owning directory, bytes)
+            claims: Dict[int, tuple[str, int]] = {}
+            if self.workers > 1:
+                self._scan_parallel(folder, dev, claims)
+            else:
+                self._scan(folder, dev, claims)
+            self._charge_links(folder, claims)
+        return self.sizes[folder]
+
+    def _charge_links(self, root: str, claims: Dict[int, tuple[str, int]]) -> None:
+        # Each new inode goes to the first of its directories in sorted order, and
+        # to every ancestor up to root, so attribution does not depend on scan order
+        for key, (owner, nbytes) in claims.items():
+            self._links.add(key)
+            path = owner
+            while True:
+                self.sizes[path] += nbytes
+                if path == root:
+                    break
+                path = os.path.dirname(path)
+
+    def _claim_links(self, path: str, links: tuple, claims: Dict[int, tuple[str, int]]) -> None:
+        for key, nbytes in links:
+            if key in self._links:
+                continue
+            claimed = claims.get(key)
+            if claimed is None or path < claimed[0]:
+                claims[key] = (path, nbytes)
+
+    def _file_bytes(self, st: os.stat_result) -> int:
+        if self.allocated and hasattr(st, "st_blocks"):  # No st_blocks on Windows
+            return st.st_blocks * 512
+        return st.st_size
+
+    def _read_dir(self, path: str) -> tuple[tuple[int, tuple, tuple], bool]:
+        """Summarise path as (single-link file bytes, ((inode key, bytes), ...), ((subdir name, st_dev), ...)).
+
+        The flag is False when the directory or one of its entries could not be read.
+        """
+        complete = True
+        own = 0
+        links = []
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append((entry.name, st.st_dev))
+                        elif st.st_nlink > 1:
+                            links.append((st.st_dev << 64 | st.st_ino, self._file_bytes(st)))
+                        else:
+                            own += self._file_bytes(st)
+                    except OSError:
+                        complete = False
+        except OSError:
+            complete = False  # Unreadable directories count as empty
+        return (own, tuple(links), tuple(subdirs)), complete
+
+    def _summary(self, path: str) -> tuple[int, tuple, tuple]:
+        if not self.cache_file:
+            return self._read_dir(path)[0]
+        try:
+            st = os.lstat(path)  # Before listing, so a change made meanwhile invalidates the entry
+        except OSError:
+            return self._read_dir(path)[0]
+        # ctime also catches permission changes, which leave mtime alone
+        key = (st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+        cached = self._cache.get(path)
+        if cached is not None and cached[:3] == key:
+            summary = cached[3:]
+        else:
+            summary, complete = self._read_dir(path)
+            if not complete:  # Partial listings are not cached, so they are retried next run
+                return summary
+        self._listed[path] = (*key, *summary)
+        return summary
+
+    def _list_dir(self, path: str, dev: Optional[int]) -> tuple[int, tuple, List[str]]:
+        """Return (bytes of single-link files and already-sized subdirs, multi-link files, unsized subdirs).
+
+        Subdirectories not on device dev are left out; dev=None keeps them all.
+        """
+        own, links, subdirs = self._summary(path)
+        children = []
+        for name, child_dev in subdirs:
+            if dev is not None and child_dev != dev:
+                continue
+            child = os.path.join(path, name)
+            if child in self.sizes:
+                own += self.sizes[child]
+            else:
+                children.append(child)
+        return own, links, children
+
+    def _scan(self, root: str, dev: Optional[int], claims: Dict[int, tuple[str, int]]) -> None:
+        # Each directory is visited twice: once to list it (its own files are summed
+        # and unsized subdirectories are pushed), once after its children to total up
+        pending: Dict[str, tuple[int, List[str]]] = {}
+        stack = [(root, False)]
+        while stack:
+            path, children_done = stack.pop()
+            if children_done:
+                own, children = pending.pop(path)
+                self.sizes[path] = own + sum(self.sizes[child] for child in children)
                 continue
-    return total_size / (1024 * 1024)  # Use 1024-based MB for consistency
+
+            own, links, children = self._list_dir(path, dev)
+            self._claim_links(path, links, claims)
+            pending[path] = (own, children)
+            stack.append((path, True))
+            stack.extend((child, False) for child in children)
+
+    def _scan_parallel(self, root: str, dev: Optional[int], claims: Dict[int, tuple[str, int]]) -> None:
+        lock = threading.Lock()
+        work: "queue.SimpleQueue[Optional[tuple[str, Optional[str]]]]" = queue.SimpleQueue()
+        done = threading.Event()
+        errors: List[BaseException] = []
+        # path -> [running total, children still pending, parent]
+        pending: Dict[str, list] = {}
+
+        def finish(path: str) -> None:
+            # Called with the lock held once path has no pending children; bubbles up
+            while True:
+                total, _, parent = pending.pop(path)
+                self.sizes[path] = total
+                if parent is None:
+                    done.set()
+                    return
+                parent_state = pending[parent]
+                parent_state[0] += total
+                parent_state[1] -= 1
+                if parent_state[1]:
+                    return
+                path = parent
+
+        def worker() -> None:
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                path, parent = item
+                try:
+                    own, links, children = self._list_dir(path, dev)
+                    with lock:
+                        self._claim_links(path, links, claims)
+                        pending[path] = [own, len(children), parent]
+                        if not children:
+                            finish(path)
+                    for child in children:
+                        work.put((child, path))
+                except BaseException as e:  # Never leave the caller waiting on a dead worker
+                    errors.append(e)
+                    done.set()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        work.put((root, None))
+        done.wait()
+        for _ in threads:
+            work.put(None)
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+
+class LargestFolders:
+    """
+    The `limit` largest folders seen so far (every folder when limit is None).
+
+    A min-heap keyed by (size, -discovery order), like TopKCollector in
+    git_stats, so adding a folder is O(log limit) instead of re-sorting every
+    result found so far, and on equal sizes the latest folder is evicted first.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        if limit is not None and limit < 1:
+            raise ValueError(f"--limit must be a positive integer: {limit!r}")
+        self.limit = limit
+        self._heap: List[tuple[float, int, dict]] = []
+        self._seq = 0
+
+    def add(self, folder_data: dict) -> bool:
+        """Keep folder_data if it is among the largest; return whether it was kept."""
+        entry = (folder_data["size"], -self._seq, folder_data)
+        self._seq += 1
+        if self.limit is None or len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+        else:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def sorted(self) -> List[dict]:
+        """Largest first; equal sizes keep discovery order."""
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
+
+
+class FolderDeleter:
+    """
+    Deletes folders on a pool of threads fed by a queue, so scanning goes on
+    while large trees are unlinked.
+
+    schedule() skips a folder that is, or is inside, one already scheduled.
+    When a folder containing scheduled folders is scheduled, their bytes are
+    taken off its planned bytes, so nothing is counted twice. With dry_run
+    nothing is deleted and close() reports the plan only. Freed bytes are the
+    planned bytes minus whatever is left of a folder after rmtree. Workers are
+    not daemons, so close() must always be called; close(cancel=True) drops the
+    deletions still queued and waits only for those already running.
+    """
+
+    def __init__(self, workers: int = 4, dry_run: bool = False, allocated: bool = False):
+        self.workers = max(1, workers)
+        self.dry_run = dry_run
+        self.allocated = allocated
+        self.planned_bytes = 0
+        self.freed_bytes = 0
+        self.failed: List[str] = []
+        self.cancelled: List[str] = []
+        # Top-most scheduled folders -> their full size in bytes
+        self._scheduled: Dict[str, int] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Optional[tuple[str, int]]]" = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        self._started_at: Optional[float] = None
+
+    def _is_scheduled(self, folder: str) -> bool:
+        while True:
+            if folder in self._scheduled:
+                return True
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                return False
+            folder = parent
+
+    def schedule(self, folder: str, nbytes: int) -> bool:
+        """Queue folder (nbytes in total) for deletion; False if it is already covered."""
+        folder = os.path.abspath(folder)
+        if self._is_scheduled(folder):
+            return False
+        prefix = folder.rstrip(os.sep) + os.sep
+        nested = [path for path in self._scheduled if path.startswith(prefix)]
+        planned = nbytes - sum(self._scheduled.pop(path) for path in nested)
+        self._scheduled[folder] = nbytes
+        self._count += 1
+        self.planned_bytes += planned
+        if self.dry_run:
+            return True
+
+        if not self._threads:
+            self._started_at = time.monotonic()
+            self._threads = [threading.Thread(target=self._worker) for _ in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+        self._queue.put((folder, planned))
+        return True
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            folder, planned = job
+            shutil.rmtree(folder, ignore_errors=True)
+            left = os.path.lexists(folder)
+            remaining = FolderSizer(allocated=self.allocated).size_of(folder) if left else 0
+            with self._lock:
+                self.freed_bytes += max(0, planned - remaining)
+                if left:
+                    self.failed.append(folder)
+
+    def close(self, cancel: bool = False) -> dict:
+        """Wait for queued deletions (only running ones with cancel) and return the report."""
+        if cancel:
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    self.cancelled.append(job[0])
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        seconds = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        self._threads = []
+        return {
+            "dry_run": self.dry_run,
+            "folders": self._count,
+            "planned_bytes": self.planned_bytes,
+            "freed_bytes": self.freed_bytes,
+            "failed": sorted(self.failed),
+            "cancelled": sorted(self.cancelled),
+            "seconds": seconds,
+            "bytes_per_second": self.freed_bytes / seconds if seconds else 0.0,
+        }
+
+
+def get_folder_sizes(folder_path: str, sizer: Optional[FolderSizer] = None) -> float:
+    """Calculate the total size of a folder in MB."""
+    return (sizer or FolderSizer()).size_of(folder_path) / MB
 
 
 def find_large_folders(
@@ -40,18 +455,51 @@ def find_large_folders(
     min_size_mb: int,
     delete_folders: bool = False,
     depth: Optional[int] = None,
+    workers: int = 1,
+    allocated: bool = False,
+    cross_filesystems: bool = False,
+    cache_file: Optional[str] = None,
+    limit: Optional[int] = None,
+    deleter: Optional[FolderDeleter] = None,
     **kwargs,
 ) -> Generator[dict, None, List[dict]]:
     """Find folders larger than min_size_mb and optionally delete them.
 
-    Yields individual folder data and finally returns the complete sorted list.
+    Yields each folder as it enters the `limit` largest found so far (every
+    large folder without a limit) and finally returns those, largest first.
+    Deletion goes through deleter (one is created when delete_folders is set)
+    and runs in the background; a deleter passed in is left open so the
+    caller can close() it for the report; one created here is closed on the
+    way out, cancelling queued deletions if the scan did not finish. With a
+    limit, deletion waits for the scan to finish so only the final top folders
+    are deleted. Live saves (save=True) happen at most every save_interval
+    seconds or save_every new folders, plus once at the end.
     """
-    results: List[dict] = []
+    from tqdm import tqdm
+    from jet.file import traverse_directory
+
+    results = LargestFolders(limit)
     base_dir = os.path.expanduser(base_dir)
     output_file: str = kwargs.pop("output_file", os.path.join(base_dir, "_large_folders.json"))
     save_results: bool = kwargs.pop("save", False)
+    save_interval: float = kwargs.pop("save_interval", 5.0)
+    save_every: int = kwargs.pop("save_every", 100)
+    last_save = time.monotonic()
+    unsaved = 0
+    own_deleter = deleter is None and delete_folders
+    if own_deleter:
+        deleter = FolderDeleter(allocated=allocated)
 
     total_folders = 0
+    base_dev = None
+    if not cross_filesystems:
+        try:
+            base_dev = os.lstat(base_dir).st_dev
+        except OSError:
+            pass
+    sizer = FolderSizer(
+        workers, allocated=allocated, cross_filesystems=cross_filesystems, cache_file=cache_file, dev=base_dev
+    )
     pbar = tqdm(desc="Scanning folders", unit=" folder")
 
     # Configure traversal depth/direction
@@ -59,30 +507,79 @@ def find_large_folders(
     kwargs["max_forward_depth"] = depth if direction in ("forward", "both") else None
     kwargs["max_backward_depth"] = kwargs.get("max_backward_depth") if direction in ("backward", "both") else None
 
-    for folder, current_depth in traverse_directory(base_dir, includes, excludes, **kwargs):
-        folder_size_mb = get_folder_sizes(folder)
-        if folder_size_mb >= min_size_mb:
-            total_folders += 1
-            pbar.set_postfix({"Depth": current_depth, "Large folders": total_folders})
-            pbar.update(1)
-
-            logger.success(f"\nSize: {format_size(folder_size_mb)} | Folder: {folder}")
-
-            folder_data = {"size": folder_size_mb, "file": folder, "depth": current_depth}
-            results.append(folder_data)
-            results.sort(key=lambda x: x["size"], reverse=True)
-
-            if save_results:
-                save_intermediate_results(results, output_file, min_size_mb, depth, kwargs.get("max_backward_depth"))
-
-            yield folder_data
+    completed = False
+    try:
+        for folder, current_depth in traverse_directory(base_dir, includes, excludes, **kwargs):
+            if sizer.crosses_filesystem(folder):
+                logger.info(f"Skipping folder on another filesystem: {folder}")
+                continue
+            folder_size_mb = get_folder_sizes(folder, sizer)
+            if folder_size_mb >= min_size_mb:
+                total_folders += 1
+                pbar.set_postfix({"Depth": current_depth, "Large folders": total_folders})
+                pbar.update(1)
+
+                logger.success(f"\nSize: {format_size(folder_size_mb)} | Folder: {folder}")
+
+                folder_data = {"size": folder_size_mb, "file": folder, "depth": current_depth}
+                if not results.add(folder_data):
+                    continue
+
+                unsaved += 1
+                if save_results and (unsaved >= save_every or time.monotonic() - last_save >= save_interval):
+                    save_intermediate_results(
+                        results.sorted(), output_file, min_size_mb, depth, kwargs.get("max_backward_depth")
+                    )
+                    last_save = time.monotonic()
+                    unsaved = 0
+
+                yield folder_data
+
+                if deleter is not None and limit is None:
+                    schedule_deletion(deleter, folder, sizer)
+        pbar.close()
+
+        final = results.sorted()
+        if deleter is not None and limit is not None:
+            for folder_data in final:
+                schedule_deletion(deleter, folder_data["file"], sizer)
+        if own_deleter:
+            log_deletion_report(deleter.close())
+        completed = True
+    finally:
+        pbar.close()
+        if own_deleter and not completed:
+            # Interrupted or closed early: drop queued deletions, report the ones done
+            log_deletion_report(deleter.close(cancel=True))
+        sizer.save_cache()  # Also on early exit, so an interrupted scan still warms the cache
+
+    if save_results:
+        save_intermediate_results(final, output_file, min_size_mb, depth, kwargs.get("max_backward_depth"))
+    return final
+
+
+def schedule_deletion(deleter: FolderDeleter, folder: str, sizer: FolderSizer) -> None:
+    if deleter.schedule(folder, sizer.size_of(folder)):
+        if not deleter.dry_run:
+            sizer.forget(folder)
+        logger.warning(f"{'Would delete' if deleter.dry_run else 'Deleting'} folder: {folder}")
+    else:
+        logger.info(f"Skipping folder inside one already scheduled for deletion: {folder}")
 
-            if delete_folders:
-                logger.warning(f"Deleting folder: {folder}")
-                shutil.rmtree(folder, ignore_errors=True)
 
-    pbar.close()
-    return results
+def log_deletion_report(report: dict) -> None:
+    planned = format_size(report["planned_bytes"] / MB)
+    if report["dry_run"]:
+        logger.info(f"Dry run: deleting {report['folders']} folders would free {planned}")
+        return
+    logger.info(
+        f"Freed {format_size(report['freed_bytes'] / MB)} of {planned} planned from {report['folders']} folders "
+        f"in {report['seconds']:.1f}s ({format_size(report['bytes_per_second'] / MB)}/s)"
+    )
+    for folder in report["failed"]:
+        logger.warning(f"Not fully deleted: {folder}")
+    for folder in report["cancelled"]:
+        logger.warning(f"Cancelled before deletion: {folder}")
 
 
 def save_intermediate_results(
@@ -92,7 +589,7 @@ def save_intermediate_results(
     depth: Optional[int],
     max_backward_depth: Optional[int],
 ) -> None:
-    """Save current results to JSON (used for live updates during long scans)."""
+    """Atomically save results to JSON (a reader never sees a half-written file)."""
     final_results = {
         "file": output_file,
         "size": calculate_total_size(results),
@@ -102,7 +599,11 @@ def save_intermediate_results(
         "count": len(results),
         "results": results,
     }
-    save_file(final_results, output_file)
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(final_results, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, output_file)
     logger.info(f"Updated output file: {output_file}")
 
 
@@ -156,14 +657,29 @@ if __name__ == "__main__":
                         help="Maximum upward depth when direction is backward or both.")
     parser.add_argument("--delete", action="store_true",
                         help="Delete matched folders (dangerous – use with caution).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report the folders --delete would remove and the bytes it would free, without deleting.")
+    parser.add_argument("--delete-workers", type=int, default=4,
+                        help="Threads deleting folders in the background while the scan continues.")
     parser.add_argument("--save", action="store_true",
                         help="Save results to JSON file (updates live during scan).")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Threads issuing scandir/stat calls in parallel (helps on NVMe and network mounts).")
+    parser.add_argument("--disk-usage", action="store_true",
+                        help="Size by allocated blocks (like du) instead of apparent file size.")
+    parser.add_argument("--cross-filesystems", action="store_true",
+                        help="Descend into directories mounted from other filesystems.")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="FILE",
+                        help="Reuse folder sizes of directories unchanged since the last run "
+                             "(default: a file per base_dir under ~/.cache/find_large_folders).")
     parser.add_argument("--direction", type=str, choices=["forward", "backward", "both"],
                         default="forward", help="Traversal direction.")
     parser.add_argument("-l", "--limit", type=int, default=None,
-                        help="Limit number of yielded results (not implemented yet).")
+                        help="Keep only the N largest folders in the results, saved file, total and --delete.")
 
     args = parser.parse_args()
+    if args.limit is not None and args.limit < 1:
+        parser.error(f"--limit must be a positive integer: {args.limit}")
 
     command = get_command()
     logger.log("COMMAND:", command or "[]", colors=["WHITE", "INFO"])
@@ -172,8 +688,14 @@ if __name__ == "__main__":
     excludes = [p.strip() for p in args.excludes.split(",") if p.strip()]
 
     output_file = args.output_file or os.path.join(args.base_dir, "_large_folders.json")
+    cache_file = None
+    if args.cache is not None:
+        cache_file = args.cache or default_size_cache_file(os.path.expanduser(args.base_dir))
+
+    deleter = None
+    if args.delete or args.dry_run:
+        deleter = FolderDeleter(args.delete_workers, dry_run=args.dry_run, allocated=args.disk_usage)
 
-    results = []
     generator = find_large_folders(
         base_dir=args.base_dir,
         includes=includes,
@@ -181,6 +703,12 @@ if __name__ == "__main__":
         min_size_mb=args.min_size,
         delete_folders=args.delete,
         depth=args.max_depth,
+        workers=args.workers,
+        allocated=args.disk_usage,
+        cross_filesystems=args.cross_filesystems,
+        cache_file=cache_file,
+        limit=args.limit,
+        deleter=deleter,
         direction=args.direction,
         max_backward_depth=args.max_backward_depth,
         output_file=output_file,
@@ -189,26 +717,31 @@ if __name__ == "__main__":
 
     logger.info(f"Output file: {output_file}")
 
-    for folder_data in generator:
-        results.append(folder_data)
-        results.sort(key=lambda x: x["size"], reverse=True)
-
-    total_size_mb = calculate_total_size(results)
-    formatted_total = format_size(total_size_mb)
-
-    if args.save:
-        final_results = {
-            "file": output_file,
-            "size": total_size_mb,
-            "min_size_mb": args.min_size,
-            "depth": args.max_depth,
-            "max_backward_depth": args.max_backward_depth,
-            "count": len(results),
-            "results": results,
-        }
-        save_file(final_results, output_file)
-
-    if args.delete:
-        print(f"Total Freed Space: {formatted_total}")
-    else:
-        print(f"Total Size of top-level large folders: {formatted_total}")
\ No newline at end of file
+    # Folders are logged as they are found; the return value is the final, sorted list
+    results = None
+    report = None
+    try:
+        while True:
+            try:
+                next(generator)
+            except StopIteration as stop:
+                results = stop.value
+                break
+    except KeyboardInterrupt:
+        generator.close()  # Saves the size cache
+        logger.warning("Interrupted: queued deletions are cancelled, running ones are finished")
+    finally:
+        # Always joined, even on errors, since deleter workers are not daemons
+        if deleter is not None:
+            report = deleter.close(cancel=results is None)
+
+    if report is not None:
+        log_deletion_report(report)
+        if report["dry_run"]:
+            print(f"Reclaimable Space: {format_size(report['planned_bytes'] / MB)}")
+        else:
+            print(f"Total Freed Space: {format_size(report['freed_bytes'] / MB)}")
+    if results is None:
+        raise SystemExit(130)
+    if deleter is None:
+        print(f"Total Size of top-level large folders: {format_size(calculate_total_size(results))}")
\ No newline at end of file
@@ -1,13 +1,115 @@
 import os
+import sys
+import time
 import argparse
+import contextlib
+import csv
+import heapq
+import io
+import itertools
+import json
+import subprocess
 from datetime import datetime
-from git import Repo, InvalidGitRepositoryError, NoSuchPathError, GitCommandError
-from jet.file.utils import save_file
 import fnmatch
-from tqdm import tqdm
-from typing import Literal, Optional, List, Dict
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Literal, Optional, List, Dict, Iterable, Iterator
 import re
 
+# GitPython, tqdm, jet, sqlite3 and the executors are imported where they are used,
+# so `--mode file`, `--help` and `query` runs don't pay for them at startup
+if TYPE_CHECKING:
+    from git import Repo
+
+
+class PhaseProfiler:
+    """Wall time, item counts, git subprocesses and bytes written per phase of a run."""
+
+    FIELDS = ("wall_time", "calls", "items", "git_subprocesses", "bytes_written")
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.git_subprocesses = 0
+        self.started_at = time.perf_counter()
+
+    def _stats(self, name: str) -> Dict[str, float]:
+        return self.phases.setdefault(name, dict.fromkeys(self.FIELDS, 0))
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, float]]:
+        stats = self._stats(name)
+        git_before = self.git_subprocesses
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats["wall_time"] += time.perf_counter() - start
+            stats["calls"] += 1
+            stats["git_subprocesses"] += self.git_subprocesses - git_before
+
+    def merge(self, other: Dict) -> None:
+        """Add the phases of another profiler's `to_dict()` (e.g. from a worker process)."""
+        for name, stats in other["phases"].items():
+            mine = self._stats(name)
+            for field in self.FIELDS:
+                mine[field] += stats[field]
+        self.git_subprocesses += other["git_subprocesses"]
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_wall_time": time.perf_counter() - self.started_at,
+            "git_subprocesses": self.git_subprocesses,
+            "phases": self.phases,
+        }
+
+    def format_table(self) -> str:
+        lines = [f"{'Phase':<16}{'Time (s)':>10}{'Calls':>7}{'Items':>10}{'Git procs':>11}{'Bytes written':>15}"]
+        for name, stats in self.phases.items():
+            lines.append(
+                f"{name:<16}{stats['wall_time']:>10.3f}{stats['calls']:>7d}{stats['items']:>10d}"
+                f"{stats['git_subprocesses']:>11d}{stats['bytes_written']:>15d}"
+            )
+        data = self.to_dict()
+        lines.append(
+            f"{'total':<16}{data['total_wall_time']:>10.3f}{'':>7}{'':>10}"
+            f"{data['git_subprocesses']:>11d}{sum(s['bytes_written'] for s in self.phases.values()):>15d}"
+        )
+        return "\n".join(lines)
+
+
+_active_profiler: Optional[PhaseProfiler] = None
+_audit_hook_installed = False
+
+
+def _count_git_subprocess(event: str, args: tuple) -> None:
+    # Audit hook: sees every Popen, including the ones GitPython starts
+    if event != "subprocess.Popen" or _active_profiler is None:
+        return
+    argv = args[1]
+    argv0 = argv if isinstance(argv, (str, bytes, os.PathLike)) else argv[0]
+    if os.path.basename(os.fsdecode(argv0)).split()[0] in ("git", "git.exe"):
+        _active_profiler.git_subprocesses += 1
+
+
+@contextlib.contextmanager
+def profiling(profiler: PhaseProfiler) -> Iterator[PhaseProfiler]:
+    """Make profiler the target of profile_phase() for the duration of the block."""
+    global _active_profiler, _audit_hook_installed
+    if not _audit_hook_installed:
+        sys.addaudithook(_count_git_subprocess)
+        _audit_hook_installed = True
+    previous = _active_profiler
+    _active_profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _active_profiler = previous
+
+
+def profile_phase(name: str) -> ContextManager[Dict[str, float]]:
+    """Time a phase on the active profiler; a no-op when profiling is off."""
+    if _active_profiler is None:
+        return contextlib.nullcontext(dict.fromkeys(PhaseProfiler.FIELDS, 0))
+    return _active_profiler.phase(name)
+
 
 def format_macos_modified_time(timestamp: float) -> str:
     """Format timestamp to ISO 8601 for parsability."""
@@ -15,14 +117,154 @@ def format_macos_modified_time(timestamp: float) -> str:
     return dt.strftime("%Y-%m-%dT%H:%M:%S")
 
 
-def find_git_repos(base_dir: str) -> list[str]:
-    """Find all git repos inside base_dir (non-recursive deeper than one repo)."""
+DEFAULT_EXCLUDE_PATTERNS = frozenset({
+    '.DS_Store', 'Icon\r', '.Trashes', '.Spotlight-V100', '.fseventsd',
+    '.git', 'node_modules', 'venv', ".venv", '__pycache__', '.idea',
+    '*.pyc', '*.pyo', '*.swp', 'stats_results'
+})
+
+
+class PathMatcher:
+    """
+    Exclude/include rules compiled once per run.
+
+    Literal exclude names live in a set and glob excludes are merged into a single
+    regex. Exclusion is decided per entry name, so callers prune excluded
+    directories during the walk and never re-check their contents.
+    """
+
+    def __init__(
+        self,
+        exclude_patterns: Iterable[str] = DEFAULT_EXCLUDE_PATTERNS,
+        extensions: Optional[List[str]] = None,
+        file_pattern: Optional[str] = None
+    ):
+        literals = set()
+        globs = []
+        for pattern in exclude_patterns:
+            if any(c in pattern for c in "*?["):
+                globs.append(pattern)
+            else:
+                literals.add(pattern)
+        self.exclude_names = frozenset(literals)
+        self._exclude_glob = (
+            re.compile("|".join(fnmatch.translate(p) for p in globs)).match if globs else None
+        )
+
+        self.extensions = frozenset(extensions) if extensions else None
+
+        self.patterns = [p.strip() for p in file_pattern.split(',')] if file_pattern else []
+        self._pattern_regex = re.compile("|".join(
+            f"(?P<p{i}>{fnmatch.translate(p)})" for i, p in enumerate(self.patterns)
+        )).match if self.patterns else None
+
+    def is_excluded(self, name: str) -> bool:
+        if name in self.exclude_names:
+            return True
+        return self._exclude_glob is not None and self._exclude_glob(name) is not None
+
+    def has_extension(self, name: str) -> bool:
+        if self.extensions is None:
+            return True
+        return os.path.splitext(name)[1] in self.extensions
+
+    def _first_pattern_index(self, value: str) -> Optional[int]:
+        match = self._pattern_regex(value)
+        return int(match.lastgroup[1:]) if match else None
+
+    def match_pattern(self, name: str, rel_path: str) -> Optional[str]:
+        """Return the first --file-pattern entry matching name or rel_path, if any."""
+        indices = [
+            i for i in (self._first_pattern_index(name), self._first_pattern_index(rel_path))
+            if i is not None
+        ]
+        return self.patterns[min(indices)] if indices else None
+
+
+def find_git_dir(path: str) -> Optional[str]:
+    """
+    Return the git dir of the work tree rooted at path, or None.
+
+    Only cheap file checks: a `.git` directory holding HEAD, or a `.git` file
+    (worktrees, submodules) pointing at one.
+    """
+    dot_git = os.path.join(path, ".git")
+    if os.path.isfile(os.path.join(dot_git, "HEAD")):
+        return dot_git
+    try:
+        with open(dot_git, "r", encoding="utf-8") as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    git_dir = os.path.normpath(os.path.join(path, line[len("gitdir:"):].strip()))
+    return git_dir if os.path.isfile(os.path.join(git_dir, "HEAD")) else None
+
+
+def has_head_commit(git_dir: str) -> bool:
+    """True if HEAD resolves to a commit: detached, a loose ref, or a packed ref."""
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return False
+    if not head.startswith("ref:"):
+        return bool(re.fullmatch(r"[0-9a-f]{40}|[0-9a-f]{64}", head))
+
+    ref = head[len("ref:"):].strip()
+    # Linked worktrees keep their refs in the main repo's git dir
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    if os.path.isfile(os.path.join(common_dir, ref)):
+        return True
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), "r", encoding="utf-8") as f:
+            return any(line.rstrip("\n").endswith(" " + ref) for line in f)
+    except OSError:
+        return False
+
+
+def find_git_repos(
+    base_dir: str,
+    max_depth: Optional[int] = None,
+    exclude_patterns: Iterable[str] = DEFAULT_EXCLUDE_PATTERNS
+) -> list[str]:
+    """
+    Find all git repos inside base_dir (non-recursive deeper than one repo).
+
+    Uses os.scandir with the scan's exclude rules, so node_modules, virtualenvs
+    and the like are never entered. max_depth bounds how many directory levels
+    below base_dir a repo root may be. Symlinked directories are not followed.
+    """
+    if find_git_dir(base_dir):
+        return [base_dir]
+
+    matcher = PathMatcher(exclude_patterns)
     repos = []
-    for root, dirs, _ in os.walk(base_dir):
-        if ".git" in dirs:
-            repos.append(root)
-            dirs[:] = []  # don’t descend further once repo is found
-    return repos
+    stack = [(base_dir, 0)]
+    while stack:
+        current, current_depth = stack.pop()
+        if max_depth is not None and current_depth >= max_depth:
+            continue  # Children would be deeper than max_depth
+        try:
+            with os.scandir(current) as entries:
+                subdirs = [
+                    entry.path for entry in entries
+                    if entry.is_dir(follow_symlinks=False) and not matcher.is_excluded(entry.name)
+                ]
+        except OSError:
+            continue
+        for path in subdirs:
+            if find_git_dir(path):
+                repos.append(path)  # don’t descend further once repo is found
+            elif max_depth is None or current_depth + 1 < max_depth:
+                stack.append((path, current_depth + 1))
+    return sorted(repos)
 
 
 def generate_unique_output_filename(
@@ -32,7 +274,8 @@ def generate_unique_output_filename(
     type_filter: Literal["files", "dirs", "both"] = "both",
     file_pattern: Optional[str] = None,
     depth: Optional[int] = None,
-    is_git_repo: bool = False
+    is_git_repo: bool = False,
+    top: Optional[int] = None
 ) -> str:
     """Generate a deterministic output filename in a _stats_results subdirectory."""
     repo_name = os.path.basename(
@@ -42,6 +285,7 @@ def generate_unique_output_filename(
     ext_str = f"_ext_{'_'.join(sorted(extensions))}" if extensions else ""
     pattern_str = f"_pattern_{re.sub(r'[^a-zA-Z0-9._-]', '_', file_pattern)}" if file_pattern else ""
     depth_str = f"_depth_{depth}" if depth is not None else ""
+    depth_str += f"_top_{top}" if top else ""
     base_filename = (
         f"_git_stats_{repo_name}_{mode_str}_{type_str}{ext_str}{pattern_str}{depth_str}.json"
         if is_git_repo
@@ -54,14 +298,541 @@ def generate_unique_output_filename(
 
 
 def check_is_git_repo(base_dir: str) -> bool:
-    try:
-        repo = Repo(base_dir, search_parent_directories=True)
-        if repo.bare:
-            return False
-        list(repo.iter_commits('HEAD', max_count=1))
-        return True
-    except (InvalidGitRepositoryError, NoSuchPathError, GitCommandError, ValueError):
+    """True if base_dir is inside a (non-bare) work tree whose HEAD has a commit."""
+    path = os.path.abspath(base_dir)
+    if not os.path.isdir(path):
         return False
+    while True:
+        git_dir = find_git_dir(path)
+        if git_dir:
+            return has_head_commit(git_dir)
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+
+
+def iter_log_changes(
+    repo_dir: str,
+    revision: str = "HEAD",
+    pathspec: Optional[str] = None,
+    since_ts: Optional[float] = None
+) -> Iterator[tuple[int, str]]:
+    """
+    Stream `(committed_at, path)` pairs from `git log --name-only`, newest commit first.
+
+    With since_ts, git stops walking once it reaches commits older than the cutoff.
+    Closing the generator early kills the underlying git process.
+    """
+    committed_at = None
+    for token in _iter_log_tokens(repo_dir, ["--name-only", "--format=%x01%ct"], revision, pathspec, since_ts):
+        # Header tokens look like "\x01<ts>", path tokens after a header start with "\n"
+        if token.startswith(b"\x01"):
+            committed_at = int(token[1:])
+            continue
+        path = token.lstrip(b"\n").decode("utf-8", "surrogateescape")
+        if path and committed_at is not None:
+            yield committed_at, path
+
+
+def _iter_log_tokens(
+    repo_dir: str,
+    log_args: List[str],
+    revision: str,
+    pathspec: Optional[str],
+    since_ts: Optional[float]
+) -> Iterator[bytes]:
+    """Run `git log -z --no-renames <log_args>` and stream its NUL-separated tokens."""
+    cmd = ["git", "-C", repo_dir, "log", "-z", "--no-renames", *log_args, revision]
+    if since_ts is not None:
+        cmd.insert(4, f"--since=@{int(since_ts)} +0000")
+    if pathspec:
+        cmd += ["--", pathspec]
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        buffer = b""
+        while True:
+            chunk = proc.stdout.read(65536)
+            if not chunk:
+                break
+            tokens = (buffer + chunk).split(b"\0")
+            buffer = tokens.pop()
+            yield from tokens
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
+def iter_log_numstat(
+    repo_dir: str,
+    revision: str = "HEAD",
+    pathspec: Optional[str] = None,
+    since_ts: Optional[float] = None
+) -> Iterator[tuple[int, str, List[tuple[str, int, int]]]]:
+    """
+    Stream `(committed_at, author_email, [(path, added, removed), ...])` per commit
+    from `git log --numstat`, newest commit first. Binary files count as 0 lines.
+    """
+    commit = None
+    expect_author = False
+    for token in _iter_log_tokens(repo_dir, ["--numstat", "--format=%x01%ct%x00%aE"], revision, pathspec, since_ts):
+        token = token.lstrip(b"\n")
+        if token.startswith(b"\x01"):
+            if commit is not None:
+                yield commit
+            commit = (int(token[1:]), "", [])
+            expect_author = True
+        elif expect_author:
+            commit = (commit[0], sys.intern(token.decode("utf-8", "surrogateescape")), commit[2])
+            expect_author = False
+        elif token and commit is not None:
+            added, removed, path = token.split(b"\t", 2)
+            commit[2].append((
+                path.decode("utf-8", "surrogateescape"),
+                int(added) if added != b"-" else 0,
+                int(removed) if removed != b"-" else 0,
+            ))
+    if commit is not None:
+        yield commit
+
+
+def build_commit_time_index(
+    repo_dir: str,
+    file_paths: Iterable[str],
+    dir_paths: Iterable[str] = (),
+    pathspec: Optional[str] = None,
+    revision: str = "HEAD",
+    since_ts: Optional[float] = None
+) -> Dict[str, int]:
+    """
+    Walk `git log` once from HEAD and map each requested path to its last commit time.
+
+    Files resolve on the first commit that touches them, directories on the first
+    commit that touches anything beneath them. The walk stops as soon as every
+    requested path has been resolved, or at since_ts; paths with no newer commit
+    are left out.
+    """
+    pending_files = set(file_paths)
+    pending_dirs = set(dir_paths)
+    commit_times: Dict[str, int] = {}
+    if not pending_files and not pending_dirs:
+        return commit_times
+
+    changes = iter_log_changes(repo_dir, revision, pathspec, since_ts)
+    try:
+        for committed_at, path in changes:
+            if path in pending_files:
+                pending_files.discard(path)
+                commit_times[path] = committed_at
+            if pending_dirs:
+                parent = path.rpartition("/")[0]
+                while parent:
+                    if parent in pending_dirs:
+                        pending_dirs.discard(parent)
+                        commit_times[parent] = committed_at
+                    parent = parent.rpartition("/")[0]
+            if not pending_files and not pending_dirs:
+                break
+    finally:
+        changes.close()
+
+    return commit_times
+
+
+def aggregate_dir_times(file_times: Dict[str, float]) -> Dict[str, float]:
+    """
+    Derive directory times from file times as a max-reduction up the path hierarchy.
+
+    Each file pushes its time into its ancestors until it meets one that is already
+    at least as recent, so every ancestor chain is climbed only as far as needed.
+    """
+    dir_times: Dict[str, float] = {}
+    for path, updated_at in file_times.items():
+        parent = os.path.dirname(path)
+        while parent:
+            current = dir_times.get(parent)
+            if current is not None and current >= updated_at:
+                break
+            dir_times[parent] = updated_at
+            parent = os.path.dirname(parent)
+    return dir_times
+
+
+COMMIT_CACHE_VERSION = 1
+
+
+def get_commit_cache_file(base_dir: str) -> str:
+    """Location of the persistent commit-time cache for base_dir."""
+    return os.path.join(base_dir, "_stats_results", "_commit_times_cache.json")
+
+
+def load_commit_cache(cache_file: str, repo_dir: str) -> tuple[Optional[str], Dict[str, int]]:
+    """Return `(head_sha, commit_times)` from cache_file, or `(None, {})` if unusable."""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != COMMIT_CACHE_VERSION
+        or data.get("repo") != repo_dir
+    ):
+        return None, {}
+    return data.get("head"), data.get("commit_times", {})
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_file, path)
+
+
+def save_commit_cache(cache_file: str, repo_dir: str, head: str, commit_times: Dict[str, int]) -> None:
+    """Atomically write the commit-time cache."""
+    _write_json_atomic(cache_file, {
+        "version": COMMIT_CACHE_VERSION,
+        "repo": repo_dir,
+        "head": head,
+        "commit_times": commit_times,
+    })
+
+
+def is_ancestor(repo_dir: str, ancestor: str, descendant: str) -> bool:
+    result = subprocess.run(
+        ["git", "-C", repo_dir, "merge-base", "--is-ancestor", ancestor, descendant],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+    )
+    return result.returncode == 0
+
+
+def get_cached_commit_times(
+    repo_dir: str,
+    head: str,
+    file_paths: Iterable[str],
+    dir_paths: Iterable[str],
+    cache_file: str,
+    pathspec: Optional[str] = None,
+    since_ts: Optional[float] = None
+) -> Dict[str, int]:
+    """
+    Resolve commit times through the on-disk cache.
+
+    When the cached HEAD is an ancestor of the current HEAD, only the new commits are
+    walked and the paths they touch are refreshed. A rewritten history (or a cache from
+    another repo) triggers a rebuild. Paths not yet in the cache are resolved with
+    `build_commit_time_index` and added before the cache is written back; with
+    since_ts that walk is bounded, so paths without newer commits stay unresolved.
+    """
+    file_paths = list(file_paths)
+    dir_paths = list(dir_paths)
+    cached_head, commit_times = load_commit_cache(cache_file, repo_dir)
+
+    if cached_head != head:
+        if cached_head and is_ancestor(repo_dir, cached_head, head):
+            # Newest first, so the first time a path shows up in the range wins
+            touched: Dict[str, int] = {}
+            for committed_at, path in iter_log_changes(repo_dir, f"{cached_head}..{head}"):
+                touched.setdefault(path, committed_at)
+                parent = path.rpartition("/")[0]
+                while parent:
+                    touched.setdefault(parent, committed_at)
+                    parent = parent.rpartition("/")[0]
+            # A merged branch can bring in commits older than the cached time; keep the newer
+            for path, committed_at in touched.items():
+                commit_times[path] = max(commit_times.get(path, committed_at), committed_at)
+        else:
+            commit_times = {}
+
+    missing_files = [p for p in file_paths if p not in commit_times]
+    missing_dirs = [p for p in dir_paths if p not in commit_times]
+    if missing_files or missing_dirs:
+        commit_times.update(
+            build_commit_time_index(
+                repo_dir, missing_files, missing_dirs, pathspec=pathspec, revision=head, since_ts=since_ts
+            )
+        )
+
+    save_commit_cache(cache_file, repo_dir, head, commit_times)
+    return {p: commit_times[p] for p in file_paths + dir_paths if p in commit_times}
+
+
+class ChurnStats:
+    """History totals for one file or directory."""
+
+    __slots__ = ("last_commit", "commits", "authors", "lines_added", "lines_removed")
+
+    def __init__(self, last_commit: int, commits: int = 0, authors: Optional[set] = None,
+                 lines_added: int = 0, lines_removed: int = 0):
+        self.last_commit = last_commit
+        self.commits = commits
+        self.authors = authors if authors is not None else set()
+        self.lines_added = lines_added
+        self.lines_removed = lines_removed
+
+    def merge_older(self, older: "ChurnStats") -> None:
+        """Fold in the totals of a disjoint, older range of history."""
+        # A merged branch can make the newer range's last commit older than the cached one
+        self.last_commit = max(self.last_commit, older.last_commit)
+        self.commits += older.commits
+        self.authors |= older.authors
+        self.lines_added += older.lines_added
+        self.lines_removed += older.lines_removed
+
+    def to_fields(self) -> Dict[str, int]:
+        return {
+            "commits": self.commits,
+            "authors": len(self.authors),
+            "lines_added": self.lines_added,
+            "lines_removed": self.lines_removed,
+        }
+
+
+CHURN_FIELDS = ["commits", "authors", "lines_added", "lines_removed"]
+
+
+def build_churn_index(
+    repo_dir: str,
+    revision: str = "HEAD",
+    pathspec: Optional[str] = None,
+    since_ts: Optional[float] = None
+) -> Dict[str, ChurnStats]:
+    """
+    Walk `git log --numstat` once and total commits, authors and lines per path.
+
+    Every path's entry is also pushed into its ancestor directories; a commit counts
+    once per directory however many files beneath it changed. `last_commit` is the
+    time of the first (newest) commit seen, i.e. the same value as the commit-time index.
+    """
+    stats: Dict[str, ChurnStats] = {}
+    for committed_at, author, changes in iter_log_numstat(repo_dir, revision, pathspec, since_ts):
+        counted = set()
+        for path, added, removed in changes:
+            key = path
+            while key:
+                entry = stats.get(key)
+                if entry is None:
+                    entry = stats[key] = ChurnStats(committed_at)
+                entry.lines_added += added
+                entry.lines_removed += removed
+                if key not in counted:
+                    counted.add(key)
+                    entry.commits += 1
+                    entry.authors.add(author)
+                key = key.rpartition("/")[0]
+    return stats
+
+
+CHURN_CACHE_VERSION = 1
+
+
+def get_churn_cache_file(base_dir: str) -> str:
+    return os.path.join(base_dir, "_stats_results", "_churn_cache.json")
+
+
+def get_cached_churn(
+    repo_dir: str,
+    head: str,
+    cache_file: str,
+    pathspec: Optional[str] = None
+) -> Dict[str, ChurnStats]:
+    """
+    build_churn_index through an on-disk cache. Totals are additive over disjoint
+    ranges, so a cache from an ancestor HEAD only needs the `old..new` commits.
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    valid = (
+        isinstance(data, dict) and data.get("version") == CHURN_CACHE_VERSION
+        and data.get("repo") == repo_dir and data.get("pathspec") == pathspec
+    )
+    cached_head = data.get("head") if valid else None
+    cached = {
+        path: ChurnStats(last, commits, set(authors), added, removed)
+        for path, (last, commits, authors, added, removed) in data.get("churn", {}).items()
+    } if valid else {}
+
+    if cached_head == head:
+        return cached
+    if cached_head and is_ancestor(repo_dir, cached_head, head):
+        stats = build_churn_index(repo_dir, f"{cached_head}..{head}", pathspec)
+        for path, older in cached.items():
+            if path in stats:
+                stats[path].merge_older(older)
+            else:
+                stats[path] = older
+    else:
+        stats = build_churn_index(repo_dir, head, pathspec)
+
+    _write_json_atomic(cache_file, {
+        "version": CHURN_CACHE_VERSION,
+        "repo": repo_dir,
+        "pathspec": pathspec,
+        "head": head,
+        "churn": {
+            path: [entry.last_commit, entry.commits, sorted(entry.authors), entry.lines_added, entry.lines_removed]
+            for path, entry in stats.items()
+        },
+    })
+    return stats
+
+
+DEFAULT_AGE_BUCKETS = [30, 90, 365, 1095]
+
+
+def parse_age_buckets(spec: str) -> List[int]:
+    """Parse comma-separated bucket edges in days, e.g. "30,90,365"."""
+    try:
+        edges = sorted({int(part) for part in spec.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError(f"Invalid --age-buckets {spec!r}: expected comma-separated days")
+    if not edges or edges[0] <= 0:
+        raise ValueError(f"Invalid --age-buckets {spec!r}: edges must be positive")
+    return edges
+
+
+def age_bucket_fields(edges: List[int]) -> List[str]:
+    """Result field names for the buckets [0, e1), [e1, e2), ..., [en, inf) days."""
+    bounds = [0] + edges
+    fields = [f"age_{lo}_{hi}d" for lo, hi in zip(bounds, edges)]
+    return fields + [f"age_{edges[-1]}d_plus"]
+
+
+def line_age_histogram(line_times: Dict[int, int], edges: List[int], now: float) -> Dict[str, int]:
+    """Count lines per age bucket from `{author_time: lines}`."""
+    fields = age_bucket_fields(edges)
+    counts = [0] * len(fields)
+    for authored_at, lines in line_times.items():
+        age_days = (now - authored_at) / 86400
+        counts[next((i for i, edge in enumerate(edges) if age_days < edge), len(edges))] += lines
+    return dict(zip(fields, counts))
+
+
+def list_blob_shas(repo_dir: str, revision: str, pathspec: Optional[str] = None) -> Dict[str, str]:
+    """Map every file path at revision (under pathspec) to its blob sha with one ls-tree call."""
+    cmd = ["git", "-C", repo_dir, "ls-tree", "-r", "-z", "--full-tree", revision]
+    if pathspec:
+        cmd += ["--", pathspec]
+    output = subprocess.run(cmd, capture_output=True, check=True).stdout
+    blobs = {}
+    for record in output.split(b"\0"):
+        if not record:
+            continue
+        meta, _, path = record.partition(b"\t")
+        _, obj_type, sha = meta.split(b" ")
+        if obj_type == b"blob":
+            blobs[path.decode("utf-8", "surrogateescape")] = sha.decode()
+    return blobs
+
+
+def blame_line_times(repo_dir: str, revision: str, path: str) -> Dict[int, int]:
+    """Return `{author_time: lines}` for path at revision from one `git blame --incremental`."""
+    output = subprocess.run(
+        ["git", "-C", repo_dir, "blame", "--incremental", revision, "--", path],
+        capture_output=True, check=False
+    ).stdout.decode("utf-8", "surrogateescape")
+    sha_lines: Dict[str, int] = {}
+    sha_times: Dict[str, int] = {}
+    current = None
+    for line in output.splitlines():
+        fields = line.split(" ")
+        if len(fields) == 4 and len(fields[0]) in (40, 64) and fields[3].isdigit():
+            current = fields[0]
+            sha_lines[current] = sha_lines.get(current, 0) + int(fields[3])
+        elif line.startswith("author-time ") and current is not None:
+            sha_times[current] = int(fields[1])
+    line_times: Dict[int, int] = {}
+    for sha, lines in sha_lines.items():
+        authored_at = sha_times[sha]
+        line_times[authored_at] = line_times.get(authored_at, 0) + lines
+    return line_times
+
+
+BLAME_CACHE_VERSION = 2
+
+
+def get_blame_cache_file(base_dir: str) -> str:
+    return os.path.join(base_dir, "_stats_results", "_blame_cache.json")
+
+
+def get_line_times(
+    repo_dir: str,
+    revision: str,
+    paths: Iterable[str],
+    pathspec: Optional[str] = None,
+    cache_file: Optional[str] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Dict[int, int]]:
+    """
+    Blame each path at revision and return `{path: {author_time: lines}}`.
+
+    Results are cached per (path, blob sha), so a file is only re-blamed once its
+    content changes. Blame follows the path's history, so identical content at two
+    paths (e.g. a copied file) is blamed separately. Missing entries are blamed on a
+    thread pool (each blame is its own git process). The cache keeps only entries
+    still present under pathspec.
+    """
+    blobs = list_blob_shas(repo_dir, revision, pathspec)
+    paths = [p for p in paths if p in blobs]
+
+    cached: Dict[tuple[str, str], Dict[int, int]] = {}
+    if cache_file:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == BLAME_CACHE_VERSION:
+                cached = {(path, sha): {int(t): n for t, n in times} for path, sha, times in data["blobs"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            cached = {}
+
+    to_blame = list(dict.fromkeys((path, blobs[path]) for path in paths if (path, blobs[path]) not in cached))
+    from concurrent.futures import ThreadPoolExecutor
+
+    with profile_phase("blame") as phase:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            blamed = executor.map(lambda key: blame_line_times(repo_dir, revision, key[0]), to_blame)
+            cached.update(zip(to_blame, blamed))
+        phase["items"] += len(to_blame)
+
+    if cache_file:
+        _write_json_atomic(cache_file, {
+            "version": BLAME_CACHE_VERSION,
+            "blobs": [
+                [path, sha, list(times.items())] for (path, sha), times in cached.items() if blobs.get(path) == sha
+            ],
+        })
+    return {path: cached[(path, blobs[path])] for path in paths}
+
+
+def list_ignored_paths(repo: "Repo") -> set[str]:
+    """
+    Absolute paths of every ignored, untracked file or directory, from one git call.
+
+    Fully ignored directories are reported once (not file by file), so the scan
+    can prune them instead of walking their contents.
+    """
+    output = repo.git.ls_files("-z", others=True, ignored=True, exclude_standard=True, directory=True)
+    return {
+        os.path.join(repo.working_tree_dir, p.rstrip("/"))
+        for p in output.split("\0")
+        if p
+    }
+
+
+def parse_since(since: str) -> float:
+    """Convert a --since date (YYYY-MM-DD, start of local day) to an epoch timestamp."""
+    try:
+        return datetime.fromisoformat(since.strip() + "T00:00:00").timestamp()
+    except ValueError as e:
+        raise ValueError(f"Invalid --since date format (use YYYY-MM-DD): {since!r}") from e
 
 
 SortKey = Literal[
@@ -72,47 +843,104 @@ SortKey = Literal[
 ]
 
 
+def get_sort_key_func(sort_by: SortKey, records: bool = False) -> tuple[Callable[[Any], Any], bool]:
+    """Return `(key_func, reverse)` for a SortKey, over result dicts or (with records) StatRecords."""
+    # Determine sort direction and field
+    reverse = False
+    key_field = sort_by
+    if sort_by.startswith("-"):
+        reverse = True
+        key_field = sort_by[1:]
+
+    if records:
+        keys = {
+            "updated_at": lambda record: record.updated_at,
+            "name": lambda record: record.name.lower(),
+            "path": lambda record: record.rel_path.lower(),
+            "depth": lambda record: record.depth,
+        }
+    else:
+        keys = {
+            "updated_at": lambda item: item["updated_at"],
+            "name": lambda item: item["basename"].lower(),
+            "path": lambda item: item["rel_path"].lower(),
+            "depth": lambda item: item["depth"],
+        }
+    if key_field not in keys:
+        raise ValueError(f"Unsupported sort field: {key_field!r}")
+    return keys[key_field], reverse
+
+
+class _HeapEntry:
+    """Heap entry ordered so that the root is the *worst* item kept."""
+
+    __slots__ = ("key", "seq", "item", "reverse")
+
+    def __init__(self, key: Any, seq: int, item: "StatRecord", reverse: bool):
+        self.key = key
+        self.seq = seq
+        self.item = item
+        self.reverse = reverse
+
+    def __lt__(self, other: "_HeapEntry") -> bool:
+        # Ties keep arrival order, like the stable sort in filter_and_sort_results
+        if self.key == other.key:
+            return self.seq > other.seq
+        return self.key < other.key if self.reverse else self.key > other.key
+
+
+class TopKCollector:
+    """
+    Keep only the first `k` items a full sort by `sort_by` would produce.
+
+    Drop-in for the results list during a scan: memory stays O(k) no matter how
+    many items are appended. `items()` returns the survivors in arrival order, so
+    `filter_and_sort_results` ranks them exactly as it would the full list.
+    """
+
+    def __init__(self, k: int, sort_by: SortKey = "updated_at"):
+        if k < 1:
+            raise ValueError(f"--top must be a positive integer: {k!r}")
+        self.k = k
+        self._key, self._reverse = get_sort_key_func(sort_by, records=True)
+        self._heap: List[_HeapEntry] = []
+        self._seq = 0
+
+    def append(self, item: "StatRecord") -> None:
+        entry = _HeapEntry(self._key(item), self._seq, item, self._reverse)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self._heap[0] < entry:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, items: Iterable["StatRecord"]) -> None:
+        for item in items:
+            self.append(item)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> List["StatRecord"]:
+        return [entry.item for entry in sorted(self._heap, key=lambda e: e.seq)]
+
+
 def filter_and_sort_results(
-    items: List[Dict],
+    items: List["StatRecord"],
     since: Optional[str] = None,
     sort_by: SortKey = "updated_at"
-) -> List[Dict]:
+) -> List["StatRecord"]:
     """
-    Filter items by minimum date (if provided) and sort them.
+    Filter records by minimum date (if provided) and sort them.
     Re-assigns 'rank' after final ordering.
     """
     filtered = items
 
     if since:
-        try:
-            # Accept YYYY-MM-DD and assume start of day
-            since_dt = datetime.fromisoformat(since.strip() + "T00:00:00")
-        except ValueError as e:
-            raise ValueError(f"Invalid --since date format (use YYYY-MM-DD): {since!r}") from e
-
-        filtered = [
-            item for item in items
-            if datetime.fromisoformat(item["updated_at"]) >= since_dt
-        ]
-
-    # Determine sort direction and field
-    reverse = False
-    key_field = sort_by
-    if sort_by.startswith("-"):
-        reverse = True
-        key_field = sort_by[1:]
-
-    def get_sort_key(item: Dict):
-        if key_field == "updated_at":
-            return item["updated_at"]
-        if key_field == "name":
-            return item["basename"].lower()
-        if key_field == "path":
-            return item["rel_path"].lower()
-        if key_field == "depth":
-            return item["depth"]
-        raise ValueError(f"Unsupported sort field: {key_field!r}")
+        since_ts = parse_since(since)
+        filtered = [item for item in items if item.updated_at >= since_ts]
 
+    get_sort_key, reverse = get_sort_key_func(sort_by, records=True)
     sorted_items = sorted(
         filtered,
         key=get_sort_key,
@@ -121,11 +949,212 @@ def filter_and_sort_results(
 
     # Re-assign ranks
     for i, item in enumerate(sorted_items, 1):
-        item["rank"] = i
+        item.rank = i
 
     return sorted_items
 
 
+class StatRecord:
+    """
+    One file or directory result, kept compact until it is written out.
+
+    The parent directory string is interned and shared by all its children, the
+    root is shared by the whole scan, and the time is an integer epoch;
+    `rel_path`, `path` and `depth` are derived on demand. `to_dict()` builds
+    the output dict.
+    """
+
+    __slots__ = ("root", "parent", "name", "updated_at", "is_dir", "matched_pattern", "extra", "rank")
+
+    def __init__(
+        self,
+        root: str,
+        parent: str,
+        name: str,
+        updated_at: float,
+        is_dir: bool = False,
+        matched_pattern: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.root = root
+        self.parent = parent
+        self.name = name
+        self.updated_at = int(updated_at)
+        self.is_dir = is_dir
+        self.matched_pattern = matched_pattern
+        self.extra = extra
+        self.rank: Optional[int] = None
+
+    @classmethod
+    def from_rel_path(cls, root: str, rel_path: str, updated_at: float, **kwargs) -> "StatRecord":
+        parent, _, name = rel_path.rpartition(os.sep)
+        return cls(root, sys.intern(parent), name, updated_at, **kwargs)
+
+    @property
+    def rel_path(self) -> str:
+        return f"{self.parent}{os.sep}{self.name}" if self.parent else self.name
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, self.rel_path)
+
+    @property
+    def depth(self) -> int:
+        return self.parent.count(os.sep) + 2 if self.parent else 1
+
+    @property
+    def type(self) -> str:
+        return "directory" if self.is_dir else "file"
+
+    def to_dict(self) -> Dict:
+        item = {
+            "basename": self.name,
+            "updated_at": format_macos_modified_time(self.updated_at),
+            "type": self.type,
+            "rel_path": self.rel_path,
+            "path": self.path,
+            "depth": self.depth,
+        }
+        if not self.is_dir:
+            item["matched_pattern"] = self.matched_pattern
+        if self.extra:
+            item.update(self.extra)
+        if self.rank is not None:
+            item["rank"] = self.rank
+        return item
+
+
+OutputFormat = Literal["json", "ndjson", "csv"]
+
+RESULT_FIELDS = ["rank", "basename", "updated_at", "type", "rel_path", "path", "depth", "matched_pattern"]
+
+
+def with_format_suffix(path: str, output_format: OutputFormat) -> str:
+    """Swap a .json output path for the extension of output_format."""
+    if output_format == "json":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root if ext == '.json' else path}.{output_format}"
+
+
+class ResultStreamWriter:
+    """
+    Write result dicts one at a time as NDJSON or CSV to one or more files.
+
+    Each file is written to a temporary sibling and atomically renamed into place
+    on successful close, so readers never see a partial file.
+    """
+
+    def __init__(self, paths: Iterable[str], output_format: OutputFormat, fields: List[str] = RESULT_FIELDS):
+        if output_format not in ("ndjson", "csv"):
+            raise ValueError(f"Unsupported streaming format: {output_format!r}")
+        self.output_format = output_format
+        self.count = 0
+        self._targets = []
+        for path in paths:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            handle = open(tmp_path, "w", encoding="utf-8", newline="")
+            writer = None
+            if output_format == "csv":
+                writer = csv.DictWriter(handle, fieldnames=fields, extrasaction="ignore")
+                writer.writeheader()
+            self._targets.append((path, tmp_path, handle, writer))
+
+    def write(self, item: Dict) -> None:
+        line = json.dumps(item, ensure_ascii=False) + "\n" if self.output_format == "ndjson" else None
+        for _, _, handle, writer in self._targets:
+            if writer is None:
+                handle.write(line)
+            else:
+                writer.writerow(item)
+        self.count += 1
+
+    def close(self, commit: bool = True) -> None:
+        for path, tmp_path, handle, _ in self._targets:
+            handle.close()
+            if commit:
+                os.replace(tmp_path, path)
+            else:
+                os.remove(tmp_path)
+        self._targets = []
+
+    def __enter__(self) -> "ResultStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(commit=exc_type is None)
+
+
+def iter_result_file(path: str, output_format: OutputFormat) -> Iterator[Dict]:
+    """Lazily read back results written by ResultStreamWriter."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if output_format == "ndjson":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                row["rank"] = int(row["rank"])
+                row["depth"] = int(row["depth"])
+                row["matched_pattern"] = row.get("matched_pattern") or None
+                for field, value in row.items():
+                    if value and (field in CHURN_FIELDS or field.startswith("age_")):
+                        row[field] = int(value)
+                yield row
+
+
+def save_results(items: Iterable[Dict], paths: List[str], output_format: OutputFormat = "json") -> int:
+    """Save results to every path in paths; streaming formats are written incrementally."""
+    with profile_phase("save") as phase:
+        if output_format == "json":
+            from jet.file.utils import save_file
+
+            items = list(items)
+            for path in paths:
+                save_file(items, path)
+            count = len(items)
+        else:
+            # Extra fields (e.g. churn) are the same on every item, so the first one sets the CSV header
+            items = iter(items)
+            first = next(items, None)
+            fields = RESULT_FIELDS + [k for k in (first or {}) if k not in RESULT_FIELDS]
+            with ResultStreamWriter(paths, output_format, fields) as writer:
+                for item in itertools.chain([first] if first else [], items):
+                    writer.write(item)
+            count = writer.count
+        phase["items"] += count
+        phase["bytes_written"] += sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+    return count
+
+
+def merge_sorted_results(
+    streams: List[Iterable[Dict]],
+    sort_by: SortKey = "updated_at",
+    top: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    K-way merge of result streams that are each already sorted by sort_by.
+
+    Ties keep stream order, matching a stable sort over the concatenated streams.
+    Ranks are re-assigned on the fly; with top, the merge stops after `top` items.
+    """
+    key, reverse = get_sort_key_func(sort_by)
+    merged = heapq.merge(*streams, key=key, reverse=reverse)
+    for rank, item in enumerate(itertools.islice(merged, top), 1):
+        item["rank"] = rank
+        yield item
+
+
+def with_progress(iterable: Iterable, desc: str, show_progress: bool) -> Iterable:
+    """Wrap iterable in a tqdm progress bar; tqdm is only imported when shown."""
+    if not show_progress:
+        return iterable
+    from tqdm import tqdm
+
+    return tqdm(iterable, desc=desc)
+
+
 def get_last_commit_dates_optimized(
     base_dir: str,
     extensions: Optional[List[str]] = None,
@@ -133,316 +1162,769 @@ def get_last_commit_dates_optimized(
     output_file: Optional[str] = None,
     mode: Literal["auto", "git", "file"] = "auto",
     type_filter: Literal["files", "dirs", "both"] = "both",
-    file_pattern: Optional[str] = None
-) -> tuple[List[Dict], bool]:
+    file_pattern: Optional[str] = None,
+    use_cache: bool = True,
+    show_progress: bool = True,
+    since: Optional[str] = None,
+    top: Optional[int] = None,
+    sort_by: SortKey = "updated_at",
+    scan_state: Optional[Dict] = None,
+    churn: bool = False,
+    line_age: Optional[List[int]] = None,
+    blame_workers: Optional[int] = None
+) -> tuple[List[StatRecord], bool]:
+    """
+    Scan base_dir and return `(records, is_git_repo)`.
+
+    With `top`, only the first `top` items under `sort_by` are kept while scanning;
+    the caller still sorts and ranks them with `filter_and_sort_results`.
+    A `scan_state` dict, if given, receives the intermediate maps (file times,
+    candidate directories, matcher, HEAD) so watch mode can update incrementally.
+    With `churn` (git mode only), the history walk also totals commits, authors and
+    lines changed, which are added to each item as CHURN_FIELDS.
+    With `line_age` (bucket edges in days, git mode only), the selected files are
+    blamed and each file and directory gets one `age_*` line count per bucket.
+    """
     if not os.path.isdir(base_dir):
         raise ValueError(f"{base_dir} is not a valid directory")
+    since_ts = parse_since(since) if since else None
 
-    exclude_patterns = {
-        '.DS_Store', 'Icon\r', '.Trashes', '.Spotlight-V100', '.fseventsd',
-        '.git', 'node_modules', 'venv', ".venv", '__pycache__', '.idea',
-        '*.pyc', '*.pyo', '*.swp', 'stats_results'
-    }
+    exclude_patterns = set(DEFAULT_EXCLUDE_PATTERNS)
     if output_file:
         exclude_patterns.add(os.path.basename(output_file))
+    matcher = PathMatcher(exclude_patterns, extensions, file_pattern)
 
     base_depth = len(base_dir.split(os.sep))
-    is_git_repo = check_is_git_repo(base_dir)
+    with profile_phase("detect_repo"):
+        is_git_repo = check_is_git_repo(base_dir)
 
     effective_mode = "git" if mode == "auto" and is_git_repo else "file" if mode in ["auto", "git"] else mode
-    results = []
+    results = TopKCollector(top, sort_by) if top else []
 
-    def is_excluded(path: str, name: str) -> bool:
-        if name in exclude_patterns:
-            return True
-        for pattern in exclude_patterns:
-            if fnmatch.fnmatch(name, pattern):
-                return True
-        rel_path = os.path.relpath(path, base_dir)
-        return any(excluded in rel_path.split(os.sep) for excluded in exclude_patterns)
+    def join_rel(parent: str, name: str) -> str:
+        return f"{parent}{os.sep}{name}" if parent else name
 
-    def calculate_depth(rel_path: str) -> int:
-        components = rel_path.split(os.sep)
-        return len([c for c in components if c]) or 1
+    def parent_of(root: str, top: str) -> str:
+        # One interned string per directory, shared by every record beneath it
+        rel_root = os.path.relpath(root, top)
+        return "" if rel_root == "." else sys.intern(rel_root)
 
     if effective_mode == "git":
-        repo = Repo(base_dir, search_parent_directories=True)
-
-        tracked_paths = set(repo.git.ls_files().splitlines())
-        ignored_paths = {
-            os.path.join(repo.working_tree_dir, p)
-            for p in repo.git.ls_files(others=True, exclude_standard=True).splitlines()
-            if repo.ignored(os.path.join(repo.working_tree_dir, p))
-        }
+        from git import Repo
+
+        with profile_phase("ls_files") as phase:
+            repo = Repo(base_dir, search_parent_directories=True)
+            tracked_paths = {p for p in repo.git.ls_files("-z").split("\0") if p}
+            phase["items"] += len(tracked_paths)
+        with profile_phase("ignored") as phase:
+            ignored_paths = list_ignored_paths(repo)
+            phase["items"] += len(ignored_paths)
+
+        root_dir = repo.working_tree_dir
+        file_entries = []  # (parent, name, rel_path, matched_pattern)
+        dir_entries = []  # (parent, name)
+
+        with profile_phase("walk") as phase:
+            walker = with_progress(os.walk(base_dir), "Scanning directories", show_progress)
+            for root, dirs, files in walker:
+                current_depth = len(root.split(os.sep)) - base_depth
+                dirs[:] = [
+                    d for d in dirs
+                    if not matcher.is_excluded(d) and os.path.join(root, d) not in ignored_paths
+                ]
+                parent = parent_of(root, root_dir)
+
+                # --line-age needs the selected files even when only directories are reported
+                if type_filter in ["files", "both"] or line_age:
+                    for name in files:
+                        if matcher.is_excluded(name) or not matcher.has_extension(name):
+                            continue
+                        rel_path = join_rel(parent, name)
+                        if rel_path not in tracked_paths:
+                            continue
+                        if ignored_paths and os.path.join(root, name) in ignored_paths:
+                            continue
+                        matched_pattern = None
+                        if matcher.patterns:
+                            matched_pattern = matcher.match_pattern(name, rel_path)
+                            if matched_pattern is None:
+                                continue
+                        file_entries.append((parent, name, rel_path, matched_pattern))
 
-        file_paths = []
-        dir_paths = []
+                if type_filter in ["dirs", "both"]:
+                    dir_entries.extend((parent, name) for name in dirs)
 
-        for root, dirs, files in tqdm(os.walk(base_dir), desc="Scanning directories"):
-            current_depth = len(root.split(os.sep)) - base_depth
-            if depth is not None and current_depth > depth:
-                continue
-            dirs[:] = [d for d in dirs if not is_excluded(os.path.join(root, d), d)]
-
-            if type_filter in ["files", "both"]:
-                for name in files:
-                    if is_excluded(os.path.join(root, name), name):
-                        continue
-                    full_path = os.path.join(root, name)
-                    rel_path = os.path.relpath(full_path, repo.working_tree_dir)
-                    if rel_path in tracked_paths and full_path not in ignored_paths:
-                        if extensions:
-                            _, ext = os.path.splitext(name)
-                            if ext not in extensions:
-                                continue
-                        if file_pattern:
-                            patterns = [p.strip() for p in file_pattern.split(',')]
-                            if not any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in patterns):
-                                continue
-                        file_paths.append(rel_path)
-
-            if type_filter in ["dirs", "both"]:
-                for name in dirs:
-                    full_path = os.path.join(root, name)
-                    rel_path = os.path.relpath(full_path, repo.working_tree_dir)
-                    if rel_path not in ['.', '..'] and full_path not in ignored_paths:
-                        contains_tracked = any(
-                            os.path.relpath(os.path.join(subroot, fname), repo.working_tree_dir) in tracked_paths
-                            for subroot, _, fnames in os.walk(full_path)
-                            for fname in fnames
-                        )
-                        if contains_tracked:
-                            dir_paths.append(rel_path)
-
-        commit_times = {}
-
-        if file_paths and type_filter in ["files", "both"]:
-            for path in tqdm(file_paths, desc="Processing file commits"):
-                try:
-                    commits = list(repo.iter_commits(paths=[path], max_count=1))
-                    if commits:
-                        commit_times[path] = format_macos_modified_time(commits[0].committed_date)
-                except (GitCommandError, ValueError):
-                    pass
+                # Directory times come from history, not the walk, so deeper levels are never visited
+                if depth is not None and current_depth >= depth:
+                    dirs[:] = []
+            phase["items"] += len(file_entries) + len(dir_entries)
 
+        base_rel = os.path.relpath(os.path.abspath(base_dir), repo.working_tree_dir)
+        pathspec = None if base_rel == "." else base_rel
+        requested_files = [rel_path for _, _, rel_path, _ in file_entries]
         if type_filter in ["dirs", "both"]:
-            for dir_path in tqdm(dir_paths, desc="Processing directory commits"):
-                try:
-                    commits = list(repo.iter_commits(paths=[dir_path], max_count=1))
-                    if commits:
-                        commit_times[dir_path] = format_macos_modified_time(commits[0].committed_date)
-                except (GitCommandError, ValueError):
-                    continue
-
-        for root, dirs, files in tqdm(os.walk(base_dir), desc="Building results"):
-            current_depth = len(root.split(os.sep)) - base_depth
-            if depth is not None and current_depth > depth:
-                continue
-            dirs[:] = [d for d in dirs if not is_excluded(os.path.join(root, d), d)]
-
-            if type_filter in ["files", "both"]:
-                for name in files:
-                    if is_excluded(os.path.join(root, name), name):
-                        continue
-                    full_path = os.path.join(root, name)
-                    rel_path = os.path.relpath(full_path, repo.working_tree_dir)
-                    if extensions:
-                        _, ext = os.path.splitext(name)
-                        if ext not in extensions:
-                            continue
-                    if rel_path in commit_times and full_path not in ignored_paths:
-                        matched_pattern = None
-                        if file_pattern:
-                            patterns = [p.strip() for p in file_pattern.split(',')]
-                            for p in patterns:
-                                if fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p):
-                                    matched_pattern = p
-                                    break
-                        if rel_path in commit_times:
-                            results.append({
-                                "basename": name,
-                                "updated_at": commit_times[rel_path],
-                                "type": "file",
-                                "rel_path": rel_path,
-                                "path": full_path,
-                                "depth": calculate_depth(rel_path),
-                                "matched_pattern": matched_pattern
-                            })
-
-            if type_filter in ["dirs", "both"]:
-                for name in dirs:
-                    full_path = os.path.join(root, name)
-                    rel_path = os.path.relpath(full_path, repo.working_tree_dir)
-                    if rel_path in commit_times and full_path not in ignored_paths:
-                        results.append({
-                            "basename": name,
-                            "updated_at": commit_times[rel_path],
-                            "type": "directory",
-                            "rel_path": rel_path,
-                            "path": full_path,
-                            "depth": calculate_depth(rel_path)
-                        })
+            # Directory times are aggregated from every tracked file beneath them
+            prefix = "" if pathspec is None else base_rel + os.sep
+            requested_files = set(requested_files)
+            requested_files.update(p for p in tracked_paths if p.startswith(prefix))
+        with profile_phase("history") as phase:
+            head = repo.head.commit.hexsha if use_cache or scan_state is not None or churn or line_age else None
+            churn_stats: Dict[str, ChurnStats] = {}
+            if churn:
+                # One --numstat walk yields both the churn totals and the commit times
+                if use_cache and since_ts is None:
+                    churn_stats = get_cached_churn(
+                        repo.working_tree_dir, head, get_churn_cache_file(base_dir), pathspec=pathspec
+                    )
+                else:
+                    churn_stats = build_churn_index(repo.working_tree_dir, head, pathspec, since_ts)
+                commit_times = {p: churn_stats[p].last_commit for p in requested_files if p in churn_stats}
+            elif use_cache:
+                commit_times = get_cached_commit_times(
+                    repo.working_tree_dir, head,
+                    requested_files, [],
+                    get_commit_cache_file(base_dir), pathspec=pathspec, since_ts=since_ts
+                )
+            else:
+                commit_times = build_commit_time_index(
+                    repo.working_tree_dir, requested_files, pathspec=pathspec, since_ts=since_ts
+                )
+            phase["items"] += len(commit_times)
+
+        age_counts: Dict[str, Dict[str, int]] = {}
+        if line_age:
+            line_times = get_line_times(
+                repo.working_tree_dir, head, [rel_path for _, _, rel_path, _ in file_entries], pathspec,
+                cache_file=get_blame_cache_file(base_dir) if use_cache else None, workers=blame_workers
+            )
+            now = time.time()
+            empty_counts = dict.fromkeys(age_bucket_fields(line_age), 0)
+            for rel_path, times in line_times.items():
+                counts = line_age_histogram(times, line_age, now)
+                age_counts[rel_path] = counts
+                # Directory histograms are sums over the selected files beneath them
+                parent = os.path.dirname(rel_path)
+                while parent:
+                    dir_counts = age_counts.setdefault(parent, dict(empty_counts))
+                    for field, lines in counts.items():
+                        dir_counts[field] += lines
+                    parent = os.path.dirname(parent)
+
+        with profile_phase("build_results") as phase:
+            def extra_fields(rel_path: str) -> Optional[Dict[str, int]]:
+                if not churn and not line_age:
+                    return None
+                extra = churn_stats[rel_path].to_fields() if churn else {}
+                if line_age:
+                    extra.update(age_counts.get(rel_path, empty_counts))
+                return extra
+
+            for parent, name, rel_path, matched_pattern in file_entries:
+                if type_filter not in ["files", "both"]:
+                    break
+                if rel_path in commit_times and (since_ts is None or commit_times[rel_path] >= since_ts):
+                    results.append(StatRecord(
+                        root_dir, parent, name, commit_times[rel_path],
+                        matched_pattern=matched_pattern, extra=extra_fields(rel_path)
+                    ))
+
+            if dir_entries:
+                dir_times = aggregate_dir_times(commit_times)
+                for parent, name in dir_entries:
+                    rel_path = join_rel(parent, name)
+                    if rel_path in dir_times and (since_ts is None or dir_times[rel_path] >= since_ts):
+                        results.append(StatRecord(
+                            root_dir, parent, name, dir_times[rel_path], is_dir=True, extra=extra_fields(rel_path)
+                        ))
+            phase["items"] += len(results)
+
+        if scan_state is not None:
+            scan_state.update(
+                mode="git", matcher=matcher, repo_dir=root_dir, head=head, pathspec=pathspec,
+                file_times=commit_times, dir_paths={join_rel(parent, name) for parent, name in dir_entries}
+            )
 
     else:  # file mode
-        for root, dirs, files in tqdm(os.walk(base_dir), desc="Scanning files (non-Git)"):
-            current_depth = len(root.split(os.sep)) - base_depth
-            if depth is not None and current_depth > depth:
-                continue
-            dirs[:] = [d for d in dirs if not is_excluded(os.path.join(root, d), d)]
+        need_dirs = type_filter in ["dirs", "both"]
+        root_dir = os.path.abspath(base_dir)
+        file_mtimes: Dict[str, float] = {}
+        dir_entries = []  # (parent, name)
+
+        with profile_phase("walk") as phase:
+            walker = with_progress(os.walk(base_dir), "Scanning files (non-Git)", show_progress)
+            for root, dirs, files in walker:
+                current_depth = len(root.split(os.sep)) - base_depth
+                within_depth = depth is None or current_depth <= depth
+                parent = parent_of(root, base_dir)
+                if need_dirs:
+                    # Excluded content is never listed but still dates the directories above it,
+                    # each excluded subtree as one entry holding its newest file time
+                    for name in dirs:
+                        if matcher.is_excluded(name):
+                            latest = latest_file_mtime(os.path.join(root, name))
+                            if latest is not None:
+                                file_mtimes[join_rel(parent, name)] = latest
+                dirs[:] = [d for d in dirs if not matcher.is_excluded(d)]
 
-            if type_filter in ["files", "both"]:
                 for name in files:
-                    if is_excluded(os.path.join(root, name), name):
+                    rel_path = join_rel(parent, name)
+                    if matcher.is_excluded(name):
+                        if need_dirs:
+                            try:
+                                file_mtimes[rel_path] = int(os.stat(os.path.join(root, name)).st_mtime)
+                            except OSError:
+                                pass
                         continue
-                    full_path = os.path.join(root, name)
-                    if extensions:
-                        _, ext = os.path.splitext(name)
-                        if ext not in extensions:
-                            continue
+                    selected = within_depth and type_filter in ["files", "both"] and matcher.has_extension(name)
                     matched_pattern = None
-                    if file_pattern:
-                        patterns = [p.strip() for p in file_pattern.split(',')]
-                        rel_path = os.path.relpath(full_path, base_dir)
-                        if not any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in patterns):
-                            continue
-                        for p in patterns:
-                            if fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p):
-                                matched_pattern = p
-                                break
-                    try:
-                        mtime = os.stat(full_path).st_mtime
-                        updated_at = format_macos_modified_time(mtime)
-                        rel_path = os.path.relpath(full_path, base_dir)
-                        results.append({
-                            "basename": name,
-                            "updated_at": updated_at,
-                            "type": "file",
-                            "rel_path": rel_path,
-                            "path": full_path,
-                            "depth": calculate_depth(rel_path),
-                            "matched_pattern": matched_pattern
-                        })
-                    except Exception:
-                        continue
-
-            if type_filter in ["dirs", "both"]:
-                for name in dirs:
-                    full_path = os.path.join(root, name)
-                    if is_excluded(full_path, name):
+                    if selected and matcher.patterns:
+                        matched_pattern = matcher.match_pattern(name, rel_path)
+                        selected = matched_pattern is not None
+                    if not selected and not need_dirs:
                         continue
                     try:
-                        latest_mtime = None
-                        for subroot, _, fnames in os.walk(full_path):
-                            for fname in fnames:
-                                fpath = os.path.join(subroot, fname)
-                                try:
-                                    mtime = os.stat(fpath).st_mtime
-                                    if latest_mtime is None or mtime > latest_mtime:
-                                        latest_mtime = mtime
-                                except Exception:
-                                    continue
-                        if latest_mtime:
-                            updated_at = format_macos_modified_time(latest_mtime)
-                            rel_path = os.path.relpath(full_path, base_dir)
-                            results.append({
-                                "basename": name,
-                                "updated_at": updated_at,
-                                "type": "directory",
-                                "rel_path": rel_path,
-                                "path": full_path,
-                                "depth": calculate_depth(rel_path)
-                            })
-                    except Exception:
+                        mtime = int(os.stat(os.path.join(root, name)).st_mtime)
+                    except OSError:
                         continue
+                    if need_dirs:
+                        file_mtimes[rel_path] = mtime
+                    if selected and (since_ts is None or mtime >= since_ts):
+                        results.append(StatRecord(root_dir, parent, name, mtime, matched_pattern=matched_pattern))
+
+                if need_dirs and within_depth:
+                    dir_entries.extend((parent, name) for name in dirs)
+
+                # Below the depth limit files only feed directory times; without dirs, stop here
+                if depth is not None and current_depth >= depth and not need_dirs:
+                    dirs[:] = []
+            phase["items"] += len(results) + len(dir_entries)
+
+        if need_dirs:
+            with profile_phase("build_results") as phase:
+                dir_mtimes = aggregate_dir_times(file_mtimes)
+                for parent, name in dir_entries:
+                    rel_path = join_rel(parent, name)
+                    if rel_path in dir_mtimes and (since_ts is None or dir_mtimes[rel_path] >= since_ts):
+                        results.append(StatRecord(root_dir, parent, name, dir_mtimes[rel_path], is_dir=True))
+                phase["items"] += len(dir_mtimes)
+
+        if scan_state is not None:
+            scan_state.update(
+                mode="file", matcher=matcher, file_times=file_mtimes,
+                dir_paths={join_rel(parent, name) for parent, name in dir_entries}
+            )
 
     # IMPORTANT: We no longer sort here — sorting & filtering is done later
+    if isinstance(results, TopKCollector):
+        return results.items(), is_git_repo
     return results, is_git_repo
 
 
-def process_file_mode(base_dir, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by):
+def latest_file_mtime(path: str) -> Optional[int]:
+    """Newest mtime of any file below path, or None if it holds no readable file."""
+    latest = None
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                mtime = int(os.stat(os.path.join(root, name)).st_mtime)
+            except OSError:
+                continue
+            if latest is None or mtime > latest:
+                latest = mtime
+    return latest
+
+
+def index_results(index_file: str, repo_dir: str, updates: List[StatRecord]) -> None:
+    """Replace repo_dir's rows in the SQLite stats index with this scan's results."""
+    from stats_index import StatsIndex
+
+    with profile_phase("index") as phase, StatsIndex(index_file) as index:
+        phase["items"] += index.replace_repo(repo_dir, (record.to_dict() for record in updates))
+
+
+def process_file_mode(base_dir, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by,
+                      top=None, output_format="json", index_file=None):
     raw_results, is_git_repo = get_last_commit_dates_optimized(
-        base_dir, extensions, depth, None, mode, type_filter, file_pattern
+        base_dir, extensions, depth, None, mode, type_filter, file_pattern, since=since,
+        top=top, sort_by=sort_by
     )
 
-    updates = filter_and_sort_results(raw_results, since=since, sort_by=sort_by)
+    # --since was already applied during the scan
+    with profile_phase("sort") as phase:
+        updates = filter_and_sort_results(raw_results, sort_by=sort_by)
+        phase["items"] += len(updates)
 
-    base_output_file = os.path.join(base_dir, "_file_stats.json")
-    output_file = output_file or generate_unique_output_filename(
-        base_dir, extensions, mode, type_filter, file_pattern, depth, is_git_repo
-    )
+    base_output_file = with_format_suffix(os.path.join(base_dir, "_file_stats.json"), output_format)
+    output_file = output_file or with_format_suffix(generate_unique_output_filename(
+        base_dir, extensions, mode, type_filter, file_pattern, depth, is_git_repo, top
+    ), output_format)
 
     print("\nTop 10 most recent/relevant items:")
-    for item in updates[:10]:
+    for record in updates[:10]:
         print(
-            f"{item['rank']:3d}. {item['rel_path']} "
-            f"({item['type']}, depth={item['depth']}): {item['updated_at']}"
+            f"{record.rank:3d}. {record.rel_path} "
+            f"({record.type}, depth={record.depth}): {format_macos_modified_time(record.updated_at)}"
         )
 
-    for item in updates:
-        if "path" in item:
-            item["path"] = os.path.abspath(item["path"])
-
-    save_file(updates, output_file)
-    save_file(updates, base_output_file)
+    save_results((record.to_dict() for record in updates), [output_file, base_output_file], output_format)
     print(f"\nFile stats saved to: {base_output_file}")
+    if index_file:
+        index_results(index_file, base_dir, updates)
 
 
-def process_repo(repo_dir, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by):
+def _process_repo(repo_dir, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by,
+                  use_cache=True, show_progress=True, top=None, output_format="json",
+                  index_file=None, churn=False, line_age=None, blame_workers=None) -> tuple[List[StatRecord], str]:
+    """process_repo, also returning the path of the per-repo output file."""
     raw_results, is_git_repo = get_last_commit_dates_optimized(
-        repo_dir, extensions, depth, None, mode, type_filter, file_pattern
+        repo_dir, extensions, depth, None, mode, type_filter, file_pattern,
+        use_cache=use_cache, show_progress=show_progress, since=since,
+        top=top, sort_by=sort_by, churn=churn, line_age=line_age, blame_workers=blame_workers
     )
 
-    updates = filter_and_sort_results(raw_results, since=since, sort_by=sort_by)
-
-    base_output_file = os.path.join(
-        repo_dir, "_git_stats.json" if is_git_repo and mode != "file" else "_file_stats.json")
+    # --since was already applied during the scan
+    with profile_phase("sort") as phase:
+        updates = filter_and_sort_results(raw_results, sort_by=sort_by)
+        phase["items"] += len(updates)
 
-    output_file = output_file or generate_unique_output_filename(
-        repo_dir, extensions, mode, type_filter, file_pattern, depth, is_git_repo
-    )
+    base_output_file = with_format_suffix(os.path.join(
+        repo_dir, "_git_stats.json" if is_git_repo and mode != "file" else "_file_stats.json"), output_format)
 
-    for item in updates:
-        if "path" in item:
-            item["path"] = os.path.abspath(item["path"])
+    output_file = output_file or with_format_suffix(generate_unique_output_filename(
+        repo_dir, extensions, mode, type_filter, file_pattern, depth, is_git_repo, top
+    ), output_format)
 
-    save_file(updates, output_file)
-    save_file(updates, base_output_file)
+    save_results((record.to_dict() for record in updates), [output_file, base_output_file], output_format)
     print(f"Repo stats saved to: {base_output_file}")
+    if index_file:
+        index_results(index_file, repo_dir, updates)
+    return updates, output_file
+
+
+def process_repo(repo_dir, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by,
+                 use_cache=True, show_progress=True, top=None, output_format="json", index_file=None, churn=False,
+                 line_age=None, blame_workers=None):
+    updates, _ = _process_repo(
+        repo_dir, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by,
+        use_cache=use_cache, show_progress=show_progress, top=top, output_format=output_format,
+        index_file=index_file, churn=churn, line_age=line_age, blame_workers=blame_workers
+    )
     return updates
 
 
-def process_combined(base_dir, repos, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by):
+def _process_repo_quietly(
+    repo_dir, *args, profile=False, **kwargs
+) -> tuple[List[StatRecord], str, str, Optional[Dict]]:
+    """
+    Run process_repo in a worker, returning its results, output file, captured console
+    output and (with profile) the worker's profiler data.
+
+    For streaming formats the results are left on disk rather than sent back to the parent.
+    """
+    buffer = io.StringIO()
+    profiler = PhaseProfiler() if profile else None
+    with contextlib.redirect_stdout(buffer), (profiling(profiler) if profiler else contextlib.nullcontext()):
+        print(f"\n=== Scanning repo: {repo_dir} ===")
+        updates, repo_output_file = _process_repo(repo_dir, *args, **kwargs, show_progress=False)
+    if kwargs.get("output_format", "json") != "json":
+        updates = []
+    return updates, repo_output_file, buffer.getvalue(), profiler.to_dict() if profiler else None
+
+
+def process_combined(base_dir, repos, extensions, depth, mode, type_filter, file_pattern, output_file, since, sort_by,
+                     use_cache=True, jobs=1, top=None, output_format="json", index_file=None, churn=False,
+                     line_age=None, blame_workers=None):
     combined = []
-    base_combined_file = os.path.join(base_dir, "_combined_stats.json")
-    combined_file = output_file or os.path.join(
+    repo_output_files = []
+    streaming = output_format != "json"
+    base_combined_file = with_format_suffix(os.path.join(base_dir, "_combined_stats.json"), output_format)
+    combined_file = output_file or with_format_suffix(os.path.join(
         base_dir, "_stats_results",
         os.path.basename(
             generate_unique_output_filename(
-                base_dir, extensions, mode, type_filter, file_pattern, depth, True
+                base_dir, extensions, mode, type_filter, file_pattern, depth, True, top
             )
         ).replace("_git_stats_", "_combined_git_stats_")
-    )
+    ), output_format)
 
-    for repo_dir in repos:
-        print(f"\n=== Scanning repo: {repo_dir} ===")
-        updates = process_repo(
-            repo_dir, extensions, depth, mode, type_filter, file_pattern, None, since, sort_by
+    repo_args = (extensions, depth, mode, type_filter, file_pattern, None, since, sort_by)
+    # Each repo (and each worker) writes its own rows to the index
+    repo_kwargs = {
+        "use_cache": use_cache, "top": top, "output_format": output_format, "index_file": index_file, "churn": churn,
+        "line_age": line_age, "blame_workers": blame_workers
+    }
+    if jobs > 1 and len(repos) > 1:
+        # Each worker buffers its own output; blocks are printed whole, in repo order,
+        # so the combined list is identical to a sequential run
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(repos))) as executor:
+            futures = [
+                executor.submit(
+                    _process_repo_quietly, repo_dir, *repo_args,
+                    profile=_active_profiler is not None, **repo_kwargs
+                )
+                for repo_dir in repos
+            ]
+            for future in futures:
+                updates, repo_output_file, output, profile_data = future.result()
+                print(output, end="")
+                if profile_data and _active_profiler is not None:
+                    _active_profiler.merge(profile_data)
+                combined.extend(updates)
+                repo_output_files.append(repo_output_file)
+    else:
+        for repo_dir in repos:
+            print(f"\n=== Scanning repo: {repo_dir} ===")
+            updates, repo_output_file = _process_repo(repo_dir, *repo_args, **repo_kwargs)
+            if not streaming:
+                combined.extend(updates)
+            repo_output_files.append(repo_output_file)
+
+    if streaming:
+        # Per-repo files are already sorted: merge them from disk instead of re-sorting in memory
+        streams = [iter_result_file(path, output_format) for path in repo_output_files]
+        count = save_results(
+            merge_sorted_results(streams, sort_by=sort_by, top=top),
+            [combined_file, base_combined_file], output_format
         )
-        combined.extend(updates)
+        print(f"\nCombined stats ({count} items) saved to: {base_combined_file}")
+        return
+
+    # Final sort & rank for combined results (each repo is already filtered by --since)
+    with profile_phase("sort") as phase:
+        if top:
+            # The global top K is always within the union of the per-repo top K lists
+            collector = TopKCollector(top, sort_by)
+            collector.extend(combined)
+            combined = collector.items()
+        combined = filter_and_sort_results(combined, sort_by=sort_by)
+        phase["items"] += len(combined)
+
+    save_results((record.to_dict() for record in combined), [combined_file, base_combined_file])
+    print(f"\nCombined stats saved to: {base_combined_file}")
 
-    # Final sort & rank for combined results
-    combined = filter_and_sort_results(combined, since=since, sort_by=sort_by)
 
-    for item in combined:
-        if "path" in item:
-            item["path"] = os.path.abspath(item["path"])
+class StatsWatcher:
+    """
+    Keep a stats output live: one full scan, then incremental updates.
 
-    save_file(combined, combined_file)
-    save_file(combined, base_combined_file)
-    print(f"\nCombined stats saved to: {base_combined_file}")
+    In file mode, inotify events on the tree update only the touched files and
+    their ancestor directories. In git mode, the repo's refs are watched instead,
+    and each HEAD move walks just the new commits. Output is rewritten in debounced
+    batches. Linux only (inotify).
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        extensions: Optional[List[str]] = None,
+        depth: Optional[int] = None,
+        mode: Literal["auto", "git", "file"] = "auto",
+        type_filter: Literal["files", "dirs", "both"] = "files",
+        file_pattern: Optional[str] = None,
+        since: Optional[str] = None,
+        sort_by: SortKey = "-updated_at",
+        top: Optional[int] = None,
+        output_format: OutputFormat = "json",
+        output_file: Optional[str] = None,
+        use_cache: bool = True,
+        debounce: float = 2.0
+    ):
+        self.base_dir = os.path.abspath(base_dir)
+        self.extensions = extensions
+        self.depth = depth
+        self.mode = mode
+        self.type_filter = type_filter
+        self.file_pattern = file_pattern
+        self.since_ts = parse_since(since) if since else None
+        self.since = since
+        self.sort_by = sort_by
+        self.top = top
+        self.output_format = output_format
+        self.output_file = output_file
+        self.use_cache = use_cache
+        self.debounce = debounce
+        self.items: Dict[tuple[str, str], StatRecord] = {}
+        self.state: Dict = {}
+        self.output_paths: List[str] = []
+        self.inotify = None
+        self._dirty_dirs: set[str] = set()
+
+    # -- full scan -----------------------------------------------------------
+
+    def scan(self) -> None:
+        self.state = {}
+        results, is_git_repo = get_last_commit_dates_optimized(
+            self.base_dir, self.extensions, self.depth, None, self.mode, self.type_filter,
+            self.file_pattern, use_cache=self.use_cache, show_progress=False, since=self.since,
+            scan_state=self.state
+        )
+        self.items = {(record.type, record.rel_path): record for record in results}
+        self._dirty_dirs = set()
+
+        base_name = "_git_stats.json" if self.state["mode"] == "git" else "_file_stats.json"
+        self.output_paths = [
+            self.output_file or with_format_suffix(generate_unique_output_filename(
+                self.base_dir, self.extensions, self.mode, self.type_filter, self.file_pattern,
+                self.depth, is_git_repo, self.top
+            ), self.output_format),
+            with_format_suffix(os.path.join(self.base_dir, base_name), self.output_format),
+        ]
+        self.flush()
+
+    def flush(self) -> int:
+        """Recompute dirty directories, then sort and rewrite the outputs."""
+        if self._dirty_dirs:
+            dir_times = aggregate_dir_times(self.state["file_times"])
+            for rel_path in self._dirty_dirs:
+                updated_at = dir_times.get(rel_path)
+                if rel_path not in self.state["dir_paths"] or updated_at is None or not self._is_recent(updated_at):
+                    self.items.pop(("directory", rel_path), None)
+                else:
+                    self.items[("directory", rel_path)] = StatRecord.from_rel_path(
+                        self._root(), rel_path, updated_at, is_dir=True
+                    )
+            self._dirty_dirs = set()
+
+        items = list(self.items.values())
+        if self.top:
+            collector = TopKCollector(self.top, self.sort_by)
+            collector.extend(items)
+            items = collector.items()
+        updates = filter_and_sort_results(items, sort_by=self.sort_by)
+        return save_results((record.to_dict() for record in updates), self.output_paths, self.output_format)
+
+    # -- event handling ------------------------------------------------------
+
+    def _is_recent(self, updated_at: float) -> bool:
+        return self.since_ts is None or updated_at >= self.since_ts
+
+    def _is_own_output(self, path: str) -> bool:
+        stats_dir = os.path.join(self.base_dir, "_stats_results")
+        return path == stats_dir or path.startswith(stats_dir + os.sep) or any(
+            path.startswith(out) for out in self.output_paths
+        )
+
+    def _mark_ancestors(self, rel_path: str) -> None:
+        if self.type_filter in ["dirs", "both"]:
+            parent = os.path.dirname(rel_path)
+            while parent:
+                self._dirty_dirs.add(parent)
+                parent = os.path.dirname(parent)
+
+    def _selected_file(self, name: str, rel_path: str, depth_from_base: int) -> tuple[bool, Optional[str]]:
+        matcher = self.state["matcher"]
+        if self.type_filter not in ["files", "both"] or not matcher.has_extension(name):
+            return False, None
+        if self.depth is not None and depth_from_base > self.depth:
+            return False, None
+        if matcher.patterns:
+            matched_pattern = matcher.match_pattern(name, rel_path)
+            return matched_pattern is not None, matched_pattern
+        return True, None
+
+    def _root(self) -> str:
+        """Directory that result rel_paths are relative to (the work tree in git mode)."""
+        return self.state.get("repo_dir") or self.base_dir
+
+    def _update_file(self, rel_path: str, full_path: str, updated_at: Optional[float]) -> None:
+        """Set (or, with updated_at None, remove) the time of one file and its result."""
+        name = os.path.basename(rel_path)
+        base_parts = os.path.relpath(full_path, self.base_dir).split(os.sep)
+        if updated_at is None:
+            self.state["file_times"].pop(rel_path, None)
+            self.items.pop(("file", rel_path), None)
+        else:
+            if self.type_filter in ["dirs", "both"]:
+                self.state["file_times"][rel_path] = updated_at
+                # Directories along the way may be new candidates
+                limit = len(base_parts) if self.depth is None else min(len(base_parts), self.depth + 2)
+                for i in range(1, limit):
+                    dir_full = os.path.join(self.base_dir, *base_parts[:i])
+                    self.state["dir_paths"].add(os.path.relpath(dir_full, self._root()))
+            selected, matched_pattern = self._selected_file(name, rel_path, len(base_parts) - 1)
+            if selected and self._is_recent(updated_at):
+                self.items[("file", rel_path)] = StatRecord.from_rel_path(
+                    self._root(), rel_path, updated_at, matched_pattern=matched_pattern
+                )
+            else:
+                self.items.pop(("file", rel_path), None)
+        self._mark_ancestors(rel_path)
+
+    def _apply_fs_event(self, event) -> None:
+        rel_path = os.path.relpath(event.path, self._root())
+        parts = rel_path.split(os.sep)
+        if rel_path == "." or parts[0] == ".." or any(self.state["matcher"].is_excluded(p) for p in parts):
+            return
+        if event.is_dir:
+            if event.removed:
+                prefix = rel_path + os.sep
+                for key in [k for k in self.items if k[1] == rel_path or k[1].startswith(prefix)]:
+                    del self.items[key]
+                for path in [p for p in self.state["file_times"] if p.startswith(prefix)]:
+                    del self.state["file_times"][path]
+                self.state["dir_paths"] -= {p for p in self.state["dir_paths"] if p == rel_path or p.startswith(prefix)}
+                self._mark_ancestors(rel_path)
+            else:
+                self.inotify.add_tree(event.path, self._should_descend)
+                for root, dirs, files in os.walk(event.path):
+                    dirs[:] = [d for d in dirs if self._should_descend(root, d)]
+                    for name in files:
+                        self._apply_file_change(os.path.join(root, name))
+            return
+        if event.removed:
+            self._update_file(rel_path, event.path, None)
+        else:
+            self._apply_file_change(event.path)
+
+    def _apply_file_change(self, full_path: str) -> None:
+        rel_path = os.path.relpath(full_path, self._root())
+        if self.state["matcher"].is_excluded(os.path.basename(full_path)):
+            return
+        try:
+            mtime = os.stat(full_path).st_mtime
+        except OSError:
+            mtime = None
+        self._update_file(rel_path, full_path, mtime)
+
+    def _apply_head_change(self) -> bool:
+        repo_dir = self.state["repo_dir"]
+        result = subprocess.run(
+            ["git", "-C", repo_dir, "rev-parse", "HEAD"], capture_output=True, text=True, check=False
+        )
+        new_head = result.stdout.strip()
+        old_head = self.state["head"]
+        if not new_head or new_head == old_head:
+            return False
+        if not old_head or not is_ancestor(repo_dir, old_head, new_head):
+            self.scan()  # history rewritten: start over
+            return True
+
+        touched: Dict[str, int] = {}
+        for committed_at, path in iter_log_changes(repo_dir, f"{old_head}..{new_head}", self.state["pathspec"]):
+            touched.setdefault(path, committed_at)
+        for rel_path, committed_at in touched.items():
+            full_path = os.path.join(repo_dir, rel_path)
+            base_rel = os.path.relpath(full_path, self.base_dir)
+            if base_rel.startswith("..") or any(self.state["matcher"].is_excluded(p) for p in base_rel.split(os.sep)):
+                continue
+            if not os.path.lexists(full_path):
+                self._update_file(rel_path, full_path, None)
+            elif committed_at > self._known_time(rel_path):
+                # A merged branch can carry commits older than what is already known
+                self._update_file(rel_path, full_path, committed_at)
+        self.state["head"] = new_head
+        return True
+
+    def _known_time(self, rel_path: str) -> float:
+        if rel_path in self.state["file_times"]:
+            return self.state["file_times"][rel_path]
+        record = self.items.get(("file", rel_path))
+        return record.updated_at if record is not None else float("-inf")
+
+    def _should_descend(self, parent: str, name: str) -> bool:
+        return not self.state["matcher"].is_excluded(name) and not self._is_own_output(os.path.join(parent, name))
+
+    # -- main loop -----------------------------------------------------------
+
+    def start(self) -> None:
+        from inotify_watcher import Inotify
+
+        self.inotify = Inotify()
+        if self.state["mode"] == "git":
+            git_dir = subprocess.run(
+                ["git", "-C", self.state["repo_dir"], "rev-parse", "--absolute-git-dir"],
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+            # HEAD and packed-refs live in the git dir itself; branch tips under refs/heads
+            self.inotify.add_watch(git_dir)
+            self.inotify.add_tree(os.path.join(git_dir, "refs", "heads"))
+        else:
+            self.inotify.add_tree(self.base_dir, self._should_descend)
+
+    def poll(self, timeout: Optional[float]) -> bool:
+        """Apply any events arriving within timeout; True if results may have changed."""
+        events = self.inotify.read_events(timeout)
+        if not events:
+            return False
+        if any(event.overflow for event in events):
+            self.scan()
+            return True
+        if self.state["mode"] == "git":
+            return self._apply_head_change()
+        changed = False
+        for event in events:
+            if not self._is_own_output(event.path):
+                self._apply_fs_event(event)
+                changed = True
+        return changed
+
+    def run(self) -> None:
+        self.scan()
+        self.start()
+        print(f"Watching {self.base_dir} ({self.state['mode']} mode); output: {self.output_paths[-1]}")
+        pending_since = None
+        try:
+            while True:
+                changed = self.poll(self.debounce if pending_since else None)
+                now = time.monotonic()
+                if changed and pending_since is None:
+                    pending_since = now
+                # Flush after a quiet period, or at the latest after a few debounce intervals
+                if pending_since and (not changed or now - pending_since >= 5 * self.debounce):
+                    count = self.flush()
+                    print(f"[{time.strftime('%H:%M:%S')}] Updated {count} items")
+                    pending_since = None
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.inotify.close()
+
+
+def query_main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="git_stats.py query",
+        description="Query the SQLite stats index written by --index, e.g. the newest N items under a path."
+    )
+    parser.add_argument("under", nargs="?", default=None, help="Only items below this path")
+    parser.add_argument("--db", type=str, default=None,
+                        help="Index file (default: ./_stats_results/_stats.db)")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="Number of items (0 for all)")
+    parser.add_argument("--since", type=str, default=None, help="Only items updated on or after this date")
+    parser.add_argument("-t", "--type", choices=["file", "directory"], default=None)
+    parser.add_argument("-d", "--depth", type=int, default=None, help="Maximum depth within the repo")
+    parser.add_argument("--repo", type=str, default=None, help="Only items from this repo")
+    parser.add_argument("--oldest", action="store_true", help="Oldest first instead of newest first")
+    parser.add_argument("--format", choices=["text", "json", "ndjson"], default="text", dest="output_format")
+    args = parser.parse_args(argv)
+
+    from stats_index import StatsIndex, default_index_file
+
+    db_path = args.db or default_index_file(os.getcwd())
+    if not os.path.exists(db_path):
+        parser.error(f"{db_path} does not exist; run a scan with --index first")
+    with StatsIndex(db_path) as index:
+        items = index.query(
+            under=args.under, since_ts=parse_since(args.since) if args.since else None, type_filter=args.type,
+            max_depth=args.depth, repo=args.repo, limit=args.limit or None, oldest_first=args.oldest
+        )
+
+    if args.output_format == "json":
+        print(json.dumps(items, indent=2, ensure_ascii=False))
+    elif args.output_format == "ndjson":
+        for item in items:
+            print(json.dumps(item, ensure_ascii=False))
+    else:
+        for item in items:
+            print(f"{item['rank']:3d}. {item['path']} ({item['type']}, depth={item['depth']}): {item['updated_at']}")
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        query_main(sys.argv[2:])
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(
         description="Get the last modified or commit dates of files and directories with macOS-style formatting."
     )
@@ -459,29 +1941,93 @@ if __name__ == "__main__":
     parser.add_argument("--sort", type=str, default="-updated_at",
                         help="Sort by: updated_at, -updated_at (default: newest first), "
                              "name, -name, path, -path, depth, -depth")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore and do not update the commit-time cache in _stats_results")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Keep only the first K items under --sort (selected while scanning)")
+    parser.add_argument("--format", choices=["json", "ndjson", "csv"], default="json", dest="output_format",
+                        help="Output format; ndjson and csv are streamed and merged without loading every item")
+    parser.add_argument("--repo-depth", type=int, default=None,
+                        help="How many directory levels below base_dir to look for repos (default: unlimited)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of repos to scan in parallel when base_dir contains several repos")
+    parser.add_argument("--churn", action="store_true",
+                        help="Add commits, authors, lines_added and lines_removed per file and directory (git mode)")
+    parser.add_argument("--line-age", action="store_true",
+                        help="Blame the selected files and add per-bucket line counts (age_*) per file and directory")
+    parser.add_argument("--age-buckets", type=str, default=",".join(map(str, DEFAULT_AGE_BUCKETS)),
+                        help="Comma-separated bucket edges in days for --line-age (default: %(default)s)")
+    parser.add_argument("--blame-workers", type=int, default=None,
+                        help="Parallel git blame processes for --line-age (default: CPU count)")
+    parser.add_argument("--index", nargs="?", const="", default=None, metavar="DB",
+                        help="Also write results to a SQLite index (default: <base_dir>/_stats_results/_stats.db); "
+                             "read it back with `git_stats.py query`")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the first scan, keep the output updated from filesystem/ref changes (Linux)")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Seconds of quiet before --watch rewrites the output")
+    parser.add_argument("--profile", action="store_true",
+                        help="Report time, item counts, git subprocesses and bytes written per phase")
+    parser.add_argument("--profile-output", type=str, default=None,
+                        help="Where to write the --profile JSON (default: <base_dir>/_stats_results/_profile.json)")
 
     args = parser.parse_args()
 
     base_dir = args.base_dir
     extensions = [ext.strip() for ext in args.extensions.split(',')] if args.extensions else None
-
-    if args.mode == "file":
-        process_file_mode(
-            base_dir, extensions, args.depth, args.mode,
-            args.type, args.file_pattern, args.output_file,
-            args.since, args.sort
-        )
-    else:
-        repos = find_git_repos(base_dir)
-        if repos:
-            process_combined(
-                base_dir, repos, extensions, args.depth,
-                args.mode, args.type, args.file_pattern, args.output_file,
-                args.since, args.sort
-            )
-        else:
-            process_repo(
+    try:
+        line_age = parse_age_buckets(args.age_buckets) if args.line_age else None
+    except ValueError as e:
+        parser.error(str(e))
+    index_file = None
+    if args.index is not None:
+        from stats_index import default_index_file
+
+        index_file = os.path.abspath(args.index or default_index_file(base_dir))
+
+    if args.watch:
+        StatsWatcher(
+            base_dir, extensions, args.depth, args.mode, args.type, args.file_pattern,
+            since=args.since, sort_by=args.sort, top=args.top, output_format=args.output_format,
+            output_file=args.output_file, use_cache=not args.no_cache, debounce=args.debounce
+        ).run()
+        sys.exit(0)
+
+    profiler = PhaseProfiler() if args.profile else None
+    with profiling(profiler) if profiler else contextlib.nullcontext():
+        if args.mode == "file":
+            process_file_mode(
                 base_dir, extensions, args.depth, args.mode,
                 args.type, args.file_pattern, args.output_file,
-                args.since, args.sort
-            )
\ No newline at end of file
+                args.since, args.sort, top=args.top, output_format=args.output_format,
+                index_file=index_file
+            )
+        else:
+            with profile_phase("discover_repos") as phase:
+                repos = find_git_repos(base_dir, max_depth=args.repo_depth)
+                phase["items"] += len(repos)
+            if repos:
+                process_combined(
+                    base_dir, repos, extensions, args.depth,
+                    args.mode, args.type, args.file_pattern, args.output_file,
+                    args.since, args.sort, use_cache=not args.no_cache, jobs=args.jobs, top=args.top,
+                    output_format=args.output_format, index_file=index_file, churn=args.churn,
+                    line_age=line_age, blame_workers=args.blame_workers
+                )
+            else:
+                process_repo(
+                    base_dir, extensions, args.depth, args.mode,
+                    args.type, args.file_pattern, args.output_file,
+                    args.since, args.sort, use_cache=not args.no_cache, top=args.top,
+                    output_format=args.output_format, index_file=index_file, churn=args.churn,
+                    line_age=line_age, blame_workers=args.blame_workers
+                )
+
+    if profiler:
+        profile_file = args.profile_output or os.path.join(base_dir, "_stats_results", "_profile.json")
+        os.makedirs(os.path.dirname(os.path.abspath(profile_file)), exist_ok=True)
+        with open(profile_file, "w", encoding="utf-8") as f:
+            json.dump(profiler.to_dict(), f, indent=2)
+        print("\nProfile:")
+        print(profiler.format_table())
+        print(f"\nProfile saved to: {profile_file}")
@@ -0,0 +1,150 @@
+# inotify_watcher.py
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+from collections.abc import Callable
+from typing import NamedTuple
+
+# Event masks from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+DEFAULT_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyEvent(NamedTuple):
+    path: str
+    mask: int
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.mask & IN_ISDIR)
+
+    @property
+    def removed(self) -> bool:
+        return bool(self.mask & (IN_DELETE | IN_MOVED_FROM | IN_DELETE_SELF | IN_MOVE_SELF))
+
+    @property
+    def overflow(self) -> bool:
+        return bool(self.mask & IN_Q_OVERFLOW)
+
+
+class Inotify:
+    """
+    Minimal Linux inotify binding (ctypes, no third-party dependency).
+
+    Watches are per directory; `add_tree` adds a whole subtree, and new
+    directories reported by events have to be added by the caller.
+    """
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._paths: dict[int, str] = {}
+
+    def add_watch(self, path: str, mask: int = DEFAULT_MASK) -> int | None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.EACCES, errno.ENOTDIR):
+                return None
+            raise OSError(err, f"{os.strerror(err)}: {path}")
+        self._paths[wd] = path
+        return wd
+
+    def add_tree(
+        self,
+        root: str,
+        should_descend: Callable[[str, str], bool] = lambda parent, name: True,
+        mask: int = DEFAULT_MASK,
+    ) -> int:
+        """Watch root and every subdirectory accepted by should_descend(parent, name)."""
+        added = 0
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            if self.add_watch(current, mask | IN_ONLYDIR) is None:
+                continue
+            added += 1
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and should_descend(current, entry.name):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        return added
+
+    def read_events(self, timeout: float | None = None) -> list[InotifyEvent]:
+        """Wait up to timeout seconds and return all queued events."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events: list[InotifyEvent] = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    continue
+                if mask & IN_Q_OVERFLOW:
+                    events.append(InotifyEvent("", mask))
+                    continue
+                parent = self._paths.get(wd)
+                if parent is None:
+                    continue
+                path = os.path.join(parent, os.fsdecode(name)) if name else parent
+                events.append(InotifyEvent(path, mask))
+        return events
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self) -> Inotify:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
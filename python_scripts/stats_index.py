@@ -0,0 +1,159 @@
+# stats_index.py
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from collections.abc import Iterable, Iterator
+
+SCHEMA_VERSION = 1
+
+_COLUMNS = ["repo", "rel_path", "path", "basename", "type", "depth", "updated_at", "updated_ts", "matched_pattern"]
+_RESULT_KEYS = {"rank", "basename", "updated_at", "type", "rel_path", "path", "depth", "matched_pattern"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    repo TEXT NOT NULL,
+    rel_path TEXT NOT NULL,
+    path TEXT NOT NULL,
+    basename TEXT NOT NULL,
+    type TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    updated_ts REAL NOT NULL,
+    matched_pattern TEXT,
+    extra TEXT,
+    PRIMARY KEY (repo, type, rel_path)
+);
+CREATE INDEX IF NOT EXISTS idx_results_updated ON results (updated_ts);
+CREATE INDEX IF NOT EXISTS idx_results_type_updated ON results (type, updated_ts);
+CREATE INDEX IF NOT EXISTS idx_results_path ON results (path);
+CREATE INDEX IF NOT EXISTS idx_results_rel_path ON results (rel_path);
+CREATE INDEX IF NOT EXISTS idx_results_depth ON results (depth);
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    scanned_at REAL NOT NULL,
+    items INTEGER NOT NULL
+);
+"""
+
+
+def default_index_file(base_dir: str) -> str:
+    return os.path.join(base_dir, "_stats_results", "_stats.db")
+
+
+class StatsIndex:
+    """
+    SQLite store of scan results, one row per (repo, type, rel_path).
+
+    Each scan replaces the rows of its repo in a single transaction; WAL mode lets
+    queries run while another process (e.g. a parallel repo worker) is writing.
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=timeout)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{db_path} has schema version {version}, expected {SCHEMA_VERSION}")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def replace_repo(self, repo: str, items: Iterable[dict]) -> int:
+        """Replace every row of repo with items (result dicts as produced by the scan)."""
+        repo = os.path.abspath(repo)
+
+        def rows() -> Iterator[tuple]:
+            for item in items:
+                extra = {k: v for k, v in item.items() if k not in _RESULT_KEYS}
+                yield (
+                    repo, item["rel_path"], os.path.abspath(item["path"]), item["basename"], item["type"],
+                    item["depth"], item["updated_at"], datetime.fromisoformat(item["updated_at"]).timestamp(),
+                    item.get("matched_pattern"), json.dumps(extra) if extra else None,
+                )
+
+        with self.conn:
+            self.conn.execute("DELETE FROM results WHERE repo = ?", (repo,))
+            cursor = self.conn.executemany(
+                f"INSERT OR REPLACE INTO results ({', '.join(_COLUMNS)}, extra) "
+                f"VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+                rows(),
+            )
+            count = cursor.rowcount
+            self.conn.execute(
+                "INSERT OR REPLACE INTO repos (repo, scanned_at, items) VALUES (?, ?, ?)",
+                (repo, time.time(), count),
+            )
+        return count
+
+    def query(
+        self,
+        under: str | None = None,
+        since_ts: float | None = None,
+        type_filter: str | None = None,
+        max_depth: int | None = None,
+        repo: str | None = None,
+        limit: int | None = None,
+        oldest_first: bool = False,
+    ) -> list[dict]:
+        """
+        Newest (or oldest) items, optionally only those strictly below the absolute
+        path `under`. The path filter is a range on the indexed `path` column.
+        """
+        clauses = []
+        params: list = []
+        if under:
+            under = os.path.abspath(under).rstrip(os.sep)
+            # Every descendant sorts between "<under>/" and "<under>0" ("0" follows "/")
+            clauses.append("path > ? AND path < ?")
+            params += [under + os.sep, under + chr(ord(os.sep) + 1)]
+        if since_ts is not None:
+            clauses.append("updated_ts >= ?")
+            params.append(since_ts)
+        if type_filter:
+            clauses.append("type = ?")
+            params.append(type_filter)
+        if max_depth is not None:
+            clauses.append("depth <= ?")
+            params.append(max_depth)
+        if repo:
+            clauses.append("repo = ?")
+            params.append(os.path.abspath(repo))
+
+        sql = f"SELECT {', '.join(_COLUMNS)}, extra FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY updated_ts {'ASC' if oldest_first else 'DESC'}, path"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        items = []
+        for rank, row in enumerate(self.conn.execute(sql, params), 1):
+            item = {
+                "rank": rank, "basename": row["basename"], "updated_at": row["updated_at"], "type": row["type"],
+                "rel_path": row["rel_path"], "path": row["path"], "depth": row["depth"], "repo": row["repo"],
+            }
+            if row["type"] == "file":
+                item["matched_pattern"] = row["matched_pattern"]
+            if row["extra"]:
+                item.update(json.loads(row["extra"]))
+            items.append(item)
+        return items
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> StatsIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
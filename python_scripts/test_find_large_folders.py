@@ -0,0 +1,484 @@
+# test_find_large_folders.py
+
+from __future__ import annotations
+
+import copy
+import fnmatch
+import json
+import os
+import shutil
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+from find_large_folders import (
+    MB,
+    FolderDeleter,
+    FolderSizer,
+    LargestFolders,
+    _LazyLogger,
+    default_size_cache_file,
+    find_large_folders,
+    get_folder_sizes,
+    save_intermediate_results,
+)
+
+
+def write_file(path: Path, size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+def walk_size(folder: Path) -> int:
+    return sum(
+        os.lstat(os.path.join(root, name)).st_size
+        for root, _, files in os.walk(folder)
+        for name in files
+    )
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    """
+    dist/            1000
+      build/          200
+        node_modules/ 3000 + 400 (in pkg/)
+    other/             50
+    """
+    write_file(tmp_path / "dist" / "bundle.js", 1000)
+    write_file(tmp_path / "dist" / "build" / "out.o", 200)
+    write_file(tmp_path / "dist" / "build" / "node_modules" / "big.bin", 3000)
+    write_file(tmp_path / "dist" / "build" / "node_modules" / "pkg" / "index.js", 400)
+    write_file(tmp_path / "other" / "notes.txt", 50)
+    return tmp_path
+
+
+def test_folder_sizer_matches_walk(tree: Path):
+    # When
+    sizer = FolderSizer()
+
+    # Then
+    for folder in [tree, tree / "dist", tree / "dist" / "build", tree / "dist" / "build" / "node_modules"]:
+        assert sizer.size_of(str(folder)) == walk_size(folder)
+    assert sizer.size_of(str(tree / "dist")) == 4600
+
+
+def test_folder_sizer_lists_each_directory_once(tree: Path, mocker):
+    # Given
+    scandir = mocker.spy(os, "scandir")
+    sizer = FolderSizer()
+
+    # When nested folders are queried inner-first and outer-first
+    sizer.size_of(str(tree / "dist" / "build" / "node_modules"))
+    sizer.size_of(str(tree / "dist"))
+    sizer.size_of(str(tree / "dist" / "build"))
+    sizer.size_of(str(tree))
+
+    # Then
+    listed = [call.args[0] for call in scandir.call_args_list]
+    assert len(listed) == len(set(listed)) == 6
+
+
+def test_get_folder_sizes_reports_mb(tree: Path):
+    assert get_folder_sizes(str(tree / "other")) == pytest.approx(50 / MB)
+
+
+@pytest.mark.parametrize("workers", [2, 8])
+def test_parallel_folder_sizer_matches_sequential(tree: Path, workers: int):
+    # Given
+    for i in range(30):
+        write_file(tree / "wide" / f"d{i}" / "sub" / f"f{i}", i * 10)
+    sequential = FolderSizer()
+
+    # When
+    parallel = FolderSizer(workers)
+    parallel.size_of(str(tree / "dist" / "build"))
+    total = parallel.size_of(str(tree))
+
+    # Then
+    assert total == sequential.size_of(str(tree)) == walk_size(tree)
+    assert parallel.sizes == sequential.sizes
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_folder_sizer_counts_hard_links_once(tree: Path, workers: int):
+    # Given node_modules/big.bin is also linked from other/ and from dist/
+    big = tree / "dist" / "build" / "node_modules" / "big.bin"
+    os.link(big, tree / "other" / "big.bin")
+    os.link(big, tree / "dist" / "big.bin")
+    sizer = FolderSizer(workers)
+
+    # When
+    total = sizer.size_of(str(tree))
+
+    # Then
+    assert total == 1000 + 200 + 3000 + 400 + 50
+    # The shared inode goes to the alphabetically first directory holding it
+    assert sizer.size_of(str(tree / "dist")) == 4600
+    assert sizer.size_of(str(tree / "dist" / "build" / "node_modules")) == 400
+    assert sizer.size_of(str(tree / "other")) == 50
+
+
+def test_parallel_hard_link_attribution_is_deterministic(tmp_path: Path):
+    # Given one inode linked from many sibling directories
+    write_file(tmp_path / "store" / "blob", 500)
+    for i in range(40):
+        (tmp_path / f"d{i:02}").mkdir()
+        os.link(tmp_path / "store" / "blob", tmp_path / f"d{i:02}" / "blob")
+    expected = FolderSizer()
+    expected.size_of(str(tmp_path))
+
+    for _ in range(5):
+        # When
+        sizer = FolderSizer(workers=8)
+        total = sizer.size_of(str(tmp_path))
+
+        # Then
+        assert total == 500
+        assert sizer.sizes == expected.sizes
+        assert sizer.size_of(str(tmp_path / "d00")) == 500
+
+
+def test_folder_sizer_skips_other_filesystems(tree: Path):
+    # Given a sizer bound to a device the tree is not on
+    sizer = FolderSizer(dev=os.lstat(tree).st_dev + 1)
+
+    # When / Then
+    assert sizer.crosses_filesystem(str(tree / "dist"))
+    assert sizer.size_of(str(tree / "dist")) == 0
+    assert not FolderSizer(dev=os.lstat(tree).st_dev).crosses_filesystem(str(tree / "dist"))
+    assert not FolderSizer(dev=os.lstat(tree).st_dev + 1, cross_filesystems=True).crosses_filesystem(str(tree))
+
+
+def test_folder_sizer_allocated_size_of_sparse_file(tmp_path: Path):
+    # Given a 64 MB sparse file with one written block
+    with open(tmp_path / "sparse.img", "wb") as f:
+        f.truncate(64 * MB)
+        f.write(b"x" * 10)
+
+    # When
+    apparent = FolderSizer().size_of(str(tmp_path))
+    allocated = FolderSizer(allocated=True).size_of(str(tmp_path))
+
+    # Then
+    assert apparent == 64 * MB
+    assert 0 < allocated < MB
+    assert allocated == os.stat(tmp_path / "sparse.img").st_blocks * 512
+
+
+def test_size_cache_relists_only_changed_directories(tree: Path, tmp_path_factory, mocker):
+    # Given a warm cache
+    cache_file = str(tmp_path_factory.mktemp("cache") / "sizes.json")
+    first = FolderSizer(cache_file=cache_file)
+    first.size_of(str(tree))
+    first.save_cache()
+
+    # When a file is added to other/ and the tree is sized again
+    write_file(tree / "other" / "new.txt", 7)
+    scandir = mocker.spy(os, "scandir")
+    second = FolderSizer(cache_file=cache_file)
+    total = second.size_of(str(tree))
+
+    # Then
+    assert [call.args[0] for call in scandir.call_args_list] == [str(tree / "other")]
+    fresh = FolderSizer()
+    assert total == fresh.size_of(str(tree)) == walk_size(tree) == 4657
+    assert second.sizes == fresh.sizes
+
+
+def test_size_cache_ignores_unreadable_or_mismatched_file(tree: Path, tmp_path_factory):
+    # Given
+    cache_dir = tmp_path_factory.mktemp("cache")
+    corrupt = cache_dir / "corrupt.json"
+    corrupt.write_bytes(b"not json")
+    apparent = str(cache_dir / "apparent.json")
+    sizer = FolderSizer(cache_file=apparent)
+    sizer.size_of(str(tree))
+    sizer.save_cache()
+
+    # When
+    from_corrupt = FolderSizer(cache_file=str(corrupt)).size_of(str(tree))
+    allocated = FolderSizer(allocated=True, cache_file=apparent).size_of(str(tree))
+
+    # Then
+    assert from_corrupt == walk_size(tree)
+    assert allocated == FolderSizer(allocated=True).size_of(str(tree))
+
+
+def test_size_cache_keeps_only_directories_seen_in_the_run(tree: Path, tmp_path_factory):
+    # Given a warm cache
+    cache_file = tmp_path_factory.mktemp("cache") / "sizes.json"
+    first = FolderSizer(cache_file=str(cache_file))
+    first.size_of(str(tree))
+    first.save_cache()
+
+    # When node_modules is removed on disk and dist/ is forgotten as if deleted by --delete
+    shutil.rmtree(tree / "dist" / "build" / "node_modules")
+    second = FolderSizer(cache_file=str(cache_file))
+    second.size_of(str(tree))
+    second.forget(str(tree / "dist"))
+    second.save_cache()
+
+    # Then
+    saved = json.loads(cache_file.read_text())["dirs"]
+    assert sorted(saved) == [str(tree), str(tree / "other")]
+
+
+def test_size_cache_relists_directory_after_permission_change(tree: Path, tmp_path_factory, mocker):
+    # Given a warm cache
+    cache_file = str(tmp_path_factory.mktemp("cache") / "sizes.json")
+    first = FolderSizer(cache_file=cache_file)
+    first.size_of(str(tree))
+    first.save_cache()
+
+    # When other/ is chmod'ed, which changes its ctime but not its mtime
+    mtime_ns = os.stat(tree / "other").st_mtime_ns
+    os.chmod(tree / "other", 0o700)
+    scandir = mocker.spy(os, "scandir")
+    FolderSizer(cache_file=cache_file).size_of(str(tree))
+
+    # Then
+    assert os.stat(tree / "other").st_mtime_ns == mtime_ns
+    assert [call.args[0] for call in scandir.call_args_list] == [str(tree / "other")]
+
+
+def test_size_cache_skips_directories_that_could_not_be_read(tree: Path, tmp_path_factory, mocker):
+    # Given other/ cannot be listed
+    cache_file = tmp_path_factory.mktemp("cache") / "sizes.json"
+    scandir = os.scandir
+    unreadable = str(tree / "other")
+    expected = walk_size(tree) - 50
+
+    def deny(path):
+        if path == unreadable:
+            raise PermissionError(path)
+        return scandir(path)
+
+    mocker.patch("os.scandir", side_effect=deny)
+
+    # When
+    sizer = FolderSizer(cache_file=str(cache_file))
+    total = sizer.size_of(str(tree))
+    sizer.save_cache()
+
+    # Then it counts as empty for this run but is not cached
+    assert total == expected
+    saved = json.loads(cache_file.read_text())["dirs"]
+    assert unreadable not in saved and str(tree) in saved
+
+
+def test_default_size_cache_file_is_outside_the_scanned_tree(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+
+    cache_file = default_size_cache_file(str(tmp_path / "scan"))
+
+    assert cache_file.startswith(str(tmp_path / "xdg" / "find_large_folders") + os.sep)
+    assert cache_file != default_size_cache_file(str(tmp_path / "other"))
+
+
+def test_largest_folders_keeps_top_n_largest_first():
+    # Given
+    sizes = [5, 80, 20, 80, 1, 300, 45]
+    largest = LargestFolders(limit=3)
+
+    # When
+    kept = [largest.add({"size": size, "file": f"f{i}"}) for i, size in enumerate(sizes)]
+
+    # Then
+    assert kept == [True, True, True, True, False, True, False]
+    assert [d["file"] for d in largest.sorted()] == ["f5", "f1", "f3"]
+    assert LargestFolders().sorted() == []
+
+
+def test_largest_folders_keeps_earliest_on_ties():
+    # Given
+    largest = LargestFolders(limit=2)
+
+    # When
+    kept = [largest.add({"size": size, "file": f"f{i}"}) for i, size in enumerate([10, 10, 20])]
+
+    # Then the later of the two equal sizes is evicted
+    assert kept == [True, True, True]
+    assert [d["file"] for d in largest.sorted()] == ["f2", "f0"]
+
+
+def test_largest_folders_rejects_non_positive_limit():
+    with pytest.raises(ValueError):
+        LargestFolders(limit=0)
+
+
+def test_save_intermediate_results_replaces_file_atomically(tmp_path: Path, mocker):
+    # Given
+    mocker.patch("find_large_folders.logger")
+    output_file = tmp_path / "out" / "_large_folders.json"
+    results = [{"size": 2.5, "file": "/a", "depth": 1}, {"size": 1.0, "file": "/b", "depth": 2}]
+
+    # When
+    save_intermediate_results(results[:1], str(output_file), 1, None, None)
+    save_intermediate_results(results, str(output_file), 1, None, None)
+
+    # Then
+    saved = json.loads(output_file.read_text())
+    assert saved["count"] == 2 and saved["size"] == 3.5 and saved["results"] == results
+    assert os.listdir(output_file.parent) == ["_large_folders.json"]
+
+
+def test_folder_deleter_skips_nested_folders_and_reports_freed_bytes(tree: Path):
+    # Given
+    sizer = FolderSizer()
+    deleter = FolderDeleter(workers=2)
+    node_modules = tree / "dist" / "build" / "node_modules"
+
+    # When node_modules is scheduled, then an ancestor, then node_modules/pkg inside it
+    scheduled = [
+        deleter.schedule(str(node_modules), sizer.size_of(str(node_modules))),
+        deleter.schedule(str(tree / "dist"), sizer.size_of(str(tree / "dist"))),
+        deleter.schedule(str(node_modules / "pkg"), sizer.size_of(str(node_modules / "pkg"))),
+    ]
+    report = deleter.close()
+
+    # Then
+    assert scheduled == [True, True, False]
+    assert report["folders"] == 2
+    assert report["planned_bytes"] == report["freed_bytes"] == 4600
+    assert report["failed"] == []
+    assert not (tree / "dist").exists() and (tree / "other").exists()
+
+
+def test_folder_deleter_dry_run_only_plans(tree: Path):
+    # Given
+    sizer = FolderSizer()
+    deleter = FolderDeleter(dry_run=True)
+
+    # When
+    for folder in [tree / "dist" / "build", tree / "other", tree / "dist" / "build"]:
+        deleter.schedule(str(folder), sizer.size_of(str(folder)))
+    report = deleter.close()
+
+    # Then
+    assert report["planned_bytes"] == 3600 + 50
+    assert report["freed_bytes"] == 0 and report["folders"] == 2
+    assert walk_size(tree) == 4650
+
+
+def test_lazy_logger_introspection_does_not_import_jet(mocker):
+    # Given jet.logger cannot be imported
+    mocker.patch.dict(sys.modules, {"jet.logger": None})
+    lazy = _LazyLogger()
+
+    # When / Then
+    assert not hasattr(lazy, "__func__") and not hasattr(lazy, "_is_coroutine")
+    copy.copy(lazy)
+    with pytest.raises(ImportError):
+        lazy.info("needs jet")
+
+
+def test_folder_deleter_cancel_drops_queued_folders(tree: Path, mocker):
+    # Given one worker stuck deleting dist/build/node_modules, with two more folders queued behind it
+    started, release = threading.Event(), threading.Event()
+    rmtree = shutil.rmtree
+
+    def slow_rmtree(path, **kwargs):
+        started.set()
+        release.wait(5)
+        rmtree(path, **kwargs)
+
+    mocker.patch("find_large_folders.shutil.rmtree", side_effect=slow_rmtree)
+    sizer = FolderSizer()
+    deleter = FolderDeleter(workers=1)
+    node_modules = tree / "dist" / "build" / "node_modules"
+    deleter.schedule(str(node_modules), sizer.size_of(str(node_modules)))
+    started.wait(5)
+    for folder in [tree / "other", tree / "dist" / "bundle.js"]:
+        deleter.schedule(str(folder), 1)
+
+    # When
+    threading.Timer(0.2, release.set).start()
+    report = deleter.close(cancel=True)
+
+    # Then the running deletion finishes and no worker is left behind
+    assert report["cancelled"] == sorted([str(tree / "other"), str(tree / "dist" / "bundle.js")])
+    assert report["freed_bytes"] == 3400
+    assert not node_modules.exists() and (tree / "other").exists()
+    assert not any(thread.is_alive() for thread in deleter._threads)
+
+
+@pytest.fixture
+def fake_jet(mocker):
+    """jet.file.traverse_directory yielding (folder, depth) for each directory matching includes."""
+
+    def traverse_directory(base_dir, includes, excludes, **kwargs):
+        for root, dirs, _ in os.walk(base_dir):
+            dirs.sort()
+            for name in dirs:
+                if any(fnmatch.fnmatch(name, pattern) for pattern in includes):
+                    path = os.path.join(root, name)
+                    yield path, path[len(base_dir):].count(os.sep)
+
+    jet_file = types.ModuleType("jet.file")
+    jet_file.traverse_directory = traverse_directory
+    mocker.patch.dict(sys.modules, {"jet": types.ModuleType("jet"), "jet.file": jet_file})
+    return mocker.patch("find_large_folders.logger")
+
+
+def run_to_end(generator) -> tuple[list, list]:
+    yielded = []
+    while True:
+        try:
+            yielded.append(next(generator))
+        except StopIteration as stop:
+            return yielded, stop.value
+
+
+def test_find_large_folders_deletes_matches(tree: Path, fake_jet):
+    # When
+    _, final = run_to_end(find_large_folders(str(tree), ["build", "other"], [], 0, delete_folders=True))
+
+    # Then
+    assert [d["file"] for d in final] == [str(tree / "dist" / "build"), str(tree / "other")]
+    assert not (tree / "dist" / "build").exists() and not (tree / "other").exists()
+    assert (tree / "dist" / "bundle.js").exists()
+    assert any("Freed" in call.args[0] for call in fake_jet.info.call_args_list)
+
+
+def test_find_large_folders_deletes_only_final_top_folders_with_limit(tree: Path, fake_jet):
+    # When
+    yielded, final = run_to_end(
+        find_large_folders(str(tree), ["build", "node_modules", "other"], [], 0, delete_folders=True, limit=1)
+    )
+
+    # Then other/ (found first) was only briefly the top folder, and node_modules never was
+    assert [d["file"] for d in yielded] == [str(tree / "other"), str(tree / "dist" / "build")]
+    assert [d["file"] for d in final] == [str(tree / "dist" / "build")]
+    assert not (tree / "dist" / "build").exists() and (tree / "other").exists()
+
+
+def test_find_large_folders_dry_run_deletes_nothing(tree: Path, fake_jet):
+    # Given
+    deleter = FolderDeleter(dry_run=True)
+
+    # When
+    _, final = run_to_end(find_large_folders(str(tree), ["build", "node_modules", "other"], [], 0, deleter=deleter))
+    report = deleter.close()
+
+    # Then
+    assert len(final) == 3
+    assert report["folders"] == 2 and report["planned_bytes"] == 3600 + 50
+    assert walk_size(tree) == 4650
+
+
+def test_find_large_folders_closed_early_cancels_own_deleter(tree: Path, fake_jet):
+    # Given
+    generator = find_large_folders(str(tree), ["build", "other"], [], 0, delete_folders=True)
+
+    # When the caller stops once the first folder is scheduled for deletion
+    next(generator)
+    next(generator)
+    generator.close()
+
+    # Then the deleter was closed and reported, leaving no worker running
+    assert [thread for thread in threading.enumerate() if not thread.daemon] == [threading.main_thread()]
+    assert any("of" in call.args[0] and "planned" in call.args[0] for call in fake_jet.info.call_args_list)
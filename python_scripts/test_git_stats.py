@@ -0,0 +1,741 @@
+# test_git_stats.py
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from git import Repo
+from stats_index import StatsIndex
+from git_stats import (
+    aggregate_dir_times,
+    build_churn_index,
+    build_commit_time_index,
+    check_is_git_repo,
+    filter_and_sort_results,
+    find_git_repos,
+    format_macos_modified_time,
+    get_cached_churn,
+    get_cached_commit_times,
+    get_line_times,
+    get_last_commit_dates_optimized,
+    iter_result_file,
+    list_ignored_paths,
+    load_commit_cache,
+    parse_age_buckets,
+    parse_since,
+    PathMatcher,
+    PhaseProfiler,
+    process_combined,
+    process_repo,
+    profiling,
+    StatRecord,
+    StatsWatcher,
+    TopKCollector,
+)
+
+# Fixed commit timestamps (seconds since epoch) so assertions are deterministic
+T1 = 1_700_000_000
+T2 = 1_700_100_000
+T3 = 1_700_200_000
+T4 = 1_700_300_000
+
+
+def git(repo: Path, *args: str, timestamp: int | None = None) -> str:
+    env = dict(os.environ)
+    if timestamp is not None:
+        env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = f"@{timestamp} +0000"
+    return subprocess.run(
+        ["git", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+
+
+def commit_files(repo: Path, files: dict[str, str], timestamp: int, message: str = "update") -> None:
+    for rel_path, content in files.items():
+        path = repo / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", message, timestamp=timestamp)
+
+
+def init_repo(repo: Path) -> Path:
+    repo.mkdir(parents=True)
+    git(repo, "init", "-q")
+    git(repo, "config", "user.email", "dev@example.com")
+    git(repo, "config", "user.name", "Dev")
+    return repo
+
+
+@pytest.fixture
+def workspace(tmp_path: Path) -> Path:
+    """Three repos with interleaved commit times."""
+    base = tmp_path / "workspace"
+    for i, name in enumerate(["alpha", "beta", "gamma"]):
+        repo = init_repo(base / name)
+        commit_files(repo, {f"{name}.txt": name, "shared/notes.md": name}, T1 + i)
+        commit_files(repo, {f"{name}/late.txt": name}, T3 - i)
+    return base
+
+
+@pytest.fixture
+def sample_repo(tmp_path: Path) -> Path:
+    """
+    Create this history:
+
+    T1: README.md, src/app.py, src/lib/util.py, docs/guide.md
+    T2: src/lib/util.py
+    T3: docs/guide.md
+    """
+    repo = init_repo(tmp_path / "sample")
+    commit_files(repo, {
+        "README.md": "readme",
+        "src/app.py": "print('app')",
+        "src/lib/util.py": "x = 1",
+        "docs/guide.md": "guide",
+    }, T1, "initial")
+    commit_files(repo, {"src/lib/util.py": "x = 2"}, T2)
+    commit_files(repo, {"docs/guide.md": "guide v2"}, T3)
+    return repo
+
+
+def test_build_commit_time_index_resolves_files_and_dirs(sample_repo: Path):
+    # When
+    times = build_commit_time_index(
+        str(sample_repo),
+        ["README.md", "src/app.py", "src/lib/util.py"],
+        ["src", "src/lib", "docs"],
+    )
+
+    # Then
+    assert times == {
+        "README.md": T1,
+        "src/app.py": T1,
+        "src/lib/util.py": T2,
+        "src": T2,
+        "src/lib": T2,
+        "docs": T3,
+    }
+
+
+def test_build_commit_time_index_skips_unknown_paths(sample_repo: Path):
+    times = build_commit_time_index(str(sample_repo), ["README.md", "missing.txt"])
+
+    assert times == {"README.md": T1}
+
+
+def test_build_commit_time_index_with_nothing_requested(sample_repo: Path):
+    assert build_commit_time_index(str(sample_repo), []) == {}
+
+
+def test_git_mode_results(sample_repo: Path):
+    # When
+    results, is_git_repo = get_last_commit_dates_optimized(
+        str(sample_repo), mode="auto", type_filter="both"
+    )
+
+    # Then
+    assert is_git_repo
+    by_path = {record.rel_path: record.to_dict() for record in results}
+    assert by_path["src/lib/util.py"]["updated_at"] == format_macos_modified_time(T2)
+    assert by_path["docs/guide.md"]["updated_at"] == format_macos_modified_time(T3)
+    assert by_path["src"]["type"] == "directory"
+    assert by_path["src"]["updated_at"] == format_macos_modified_time(T2)
+    assert by_path["src/lib/util.py"]["depth"] == 3
+
+
+def head_sha(repo: Path) -> str:
+    return git(repo, "rev-parse", "HEAD").strip()
+
+
+def test_commit_cache_walks_only_new_commits(sample_repo: Path, tmp_path: Path):
+    # Given a cache computed at the current HEAD
+    cache_file = str(tmp_path / "cache.json")
+    files = ["README.md", "src/app.py", "src/lib/util.py"]
+    first = get_cached_commit_times(str(sample_repo), head_sha(sample_repo), files, ["src"], cache_file)
+    assert first["src"] == T2
+
+    # When a new commit touches one file
+    commit_files(sample_repo, {"src/app.py": "print('v2')"}, T4)
+    head = head_sha(sample_repo)
+    second = get_cached_commit_times(str(sample_repo), head, files, ["src"], cache_file)
+
+    # Then only the touched paths move forward and the cache follows HEAD
+    assert second == {"README.md": T1, "src/app.py": T4, "src/lib/util.py": T2, "src": T4}
+    cached_head, cached = load_commit_cache(cache_file, str(sample_repo))
+    assert cached_head == head
+    assert cached["src/app.py"] == T4
+
+
+def merge_older_branch(repo: Path) -> None:
+    """Merge a side branch from the initial commit whose docs/guide.md edits predate main's (T3)."""
+    git(repo, "checkout", "-q", "-b", "side", "HEAD~2")
+    commit_files(repo, {"docs/guide.md": "side v1"}, T1 + 100)
+    commit_files(repo, {"docs/guide.md": "side v2"}, T1 + 200)
+    git(repo, "checkout", "-q", "-")
+    git(repo, "merge", "-q", "-s", "ours", "-m", "merge side", "side", timestamp=T4)
+
+
+def test_commit_cache_keeps_newer_time_after_merging_older_branch(sample_repo: Path, tmp_path: Path):
+    # Given a cache computed at the current HEAD
+    cache_file = str(tmp_path / "cache.json")
+    get_cached_commit_times(str(sample_repo), head_sha(sample_repo), ["docs/guide.md"], ["docs"], cache_file)
+
+    # When a branch with older edits of docs/guide.md is merged
+    merge_older_branch(sample_repo)
+    head = head_sha(sample_repo)
+    cached = get_cached_commit_times(str(sample_repo), head, ["docs/guide.md"], ["docs"], cache_file)
+
+    # Then
+    assert cached == build_commit_time_index(str(sample_repo), ["docs/guide.md"], ["docs"], revision=head)
+    assert cached == {"docs/guide.md": T3, "docs": T3}
+
+
+def test_commit_cache_rebuilds_after_history_rewrite(sample_repo: Path, tmp_path: Path):
+    # Given a cache computed at the current HEAD
+    cache_file = str(tmp_path / "cache.json")
+    get_cached_commit_times(str(sample_repo), head_sha(sample_repo), ["docs/guide.md"], [], cache_file)
+
+    # When the last commit is replaced by a different one
+    git(sample_repo, "reset", "-q", "--hard", "HEAD~1")
+    commit_files(sample_repo, {"README.md": "rewritten"}, T4)
+    times = get_cached_commit_times(
+        str(sample_repo), head_sha(sample_repo), ["docs/guide.md", "README.md"], [], cache_file
+    )
+
+    # Then stale entries from the discarded commit are gone
+    assert times == {"docs/guide.md": T1, "README.md": T4}
+
+
+def test_aggregate_dir_times_takes_max_per_ancestor():
+    times = aggregate_dir_times({
+        "a/b/old.txt": 10,
+        "a/b/new.txt": 30,
+        "a/c/mid.txt": 20,
+        "top.txt": 40,
+    })
+
+    assert times == {"a/b": 30, "a/c": 20, "a": 30}
+
+
+def test_file_mode_dirs_use_latest_file_mtime(tmp_path: Path):
+    # Given
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    for rel_path, mtime in [("pkg/a.txt", T1), ("pkg/sub/b.txt", T3), ("pkg/sub/c.py", T2)]:
+        (tmp_path / rel_path).write_text("x")
+        os.utime(tmp_path / rel_path, (mtime, mtime))
+
+    # When only .py files are selected, directories still reflect every file beneath them
+    results, is_git_repo = get_last_commit_dates_optimized(
+        str(tmp_path), extensions=[".py"], mode="file", type_filter="both"
+    )
+
+    # Then
+    assert not is_git_repo
+    by_path = {record.rel_path: record.to_dict() for record in results}
+    assert set(by_path) == {"pkg", "pkg/sub", "pkg/sub/c.py"}
+    assert by_path["pkg"]["updated_at"] == format_macos_modified_time(T3)
+    assert by_path["pkg/sub/c.py"]["updated_at"] == format_macos_modified_time(T2)
+
+
+def baseline_file_mode_dir_times(base: Path) -> dict[str, int]:
+    """The former per-directory scan: every non-excluded directory re-walked in full."""
+    matcher = PathMatcher()
+    times = {}
+    for root, dirs, _ in os.walk(base):
+        dirs[:] = [d for d in dirs if not matcher.is_excluded(d)]
+        for name in dirs:
+            full_path = os.path.join(root, name)
+            mtimes = [
+                int(os.stat(os.path.join(subroot, fname)).st_mtime)
+                for subroot, _, fnames in os.walk(full_path)
+                for fname in fnames
+            ]
+            if mtimes:
+                times[os.path.relpath(full_path, base)] = max(mtimes)
+    return times
+
+
+def test_file_mode_dir_times_match_per_directory_walk(tmp_path: Path):
+    # Given excluded content that is newer than, or the only content beside, regular files
+    (tmp_path / "empty").mkdir()
+    for rel_path, mtime in [
+        ("src/app.py", T1),
+        ("src/__pycache__/app.cpython-311.pyc", T3),
+        ("only/__pycache__/x.pyc", T2),
+        ("pkg/b.txt", T1),
+        ("pkg/.DS_Store", T4),
+        ("pkg/deep/node_modules/dep/index.js", T3),
+        ("node_modules/dep/index.js", T4),
+    ]:
+        (tmp_path / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel_path).write_text("x")
+        os.utime(tmp_path / rel_path, (mtime, mtime))
+
+    # When
+    results, _ = get_last_commit_dates_optimized(str(tmp_path), mode="file", type_filter="dirs")
+
+    # Then
+    assert {record.rel_path: record.updated_at for record in results} == baseline_file_mode_dir_times(tmp_path)
+    assert {record.rel_path for record in results} == {"src", "only", "pkg", "pkg/deep"}
+
+
+class TestPathMatcher:
+    def test_literal_and_glob_excludes(self):
+        matcher = PathMatcher({"node_modules", "*.pyc", "cache-?"})
+
+        assert matcher.is_excluded("node_modules")
+        assert matcher.is_excluded("mod.pyc")
+        assert matcher.is_excluded("cache-1")
+        assert not matcher.is_excluded("cache-10")
+        assert not matcher.is_excluded("main.py")
+
+    def test_extensions(self):
+        matcher = PathMatcher(set(), extensions=[".py", ".md"])
+
+        assert matcher.has_extension("a.py")
+        assert not matcher.has_extension("a.pyc")
+        assert PathMatcher(set()).has_extension("anything")
+
+    def test_match_pattern_returns_first_matching_pattern(self):
+        matcher = PathMatcher(set(), file_pattern="src/*, *.py ,test_*")
+
+        assert matcher.match_pattern("test_app.py", "tests/test_app.py") == "*.py"
+        assert matcher.match_pattern("app.py", "src/app.py") == "src/*"
+        assert matcher.match_pattern("test_data.json", "tests/test_data.json") == "test_*"
+        assert matcher.match_pattern("README.md", "README.md") is None
+
+
+def test_process_combined_parallel_matches_sequential(workspace: Path, capsys):
+    # Given
+    base = workspace
+    repos = [str(base / name) for name in ["alpha", "beta", "gamma"]]
+    combined_file = base / "_combined_stats.json"
+
+    def run(jobs: int) -> list[dict]:
+        process_combined(
+            str(base), repos, None, None, "auto", "both", None, None, None, "-updated_at",
+            use_cache=False, jobs=jobs
+        )
+        return json.loads(combined_file.read_text())
+
+    # When
+    sequential = run(1)
+    parallel = run(3)
+
+    # Then
+    assert parallel == sequential
+    assert [item["rank"] for item in parallel] == list(range(1, len(parallel) + 1))
+    output = capsys.readouterr().out
+    assert output.index("Scanning repo: " + repos[0]) < output.index("Scanning repo: " + repos[2])
+
+
+def test_list_ignored_paths_reports_ignored_dirs_once(sample_repo: Path):
+    # Given
+    commit_files(sample_repo, {".gitignore": "build/\n*.log\n"}, T4)
+    (sample_repo / "build" / "deep").mkdir(parents=True)
+    (sample_repo / "build" / "deep" / "out.bin").write_text("bin")
+    (sample_repo / "src" / "debug.log").write_text("log")
+    (sample_repo / "src" / "new.py").write_text("untracked but not ignored")
+
+    # When
+    ignored = list_ignored_paths(Repo(sample_repo))
+
+    # Then
+    assert ignored == {str(sample_repo / "build"), str(sample_repo / "src" / "debug.log")}
+
+
+def test_build_commit_time_index_stops_at_since(sample_repo: Path):
+    times = build_commit_time_index(
+        str(sample_repo), ["README.md", "src/lib/util.py", "docs/guide.md"], since_ts=T2
+    )
+
+    assert times == {"src/lib/util.py": T2, "docs/guide.md": T3}
+
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_git_mode_since_and_depth(sample_repo: Path, use_cache: bool):
+    since = datetime.fromtimestamp(T2).strftime("%Y-%m-%d")
+
+    # When
+    results, _ = get_last_commit_dates_optimized(
+        str(sample_repo), depth=1, type_filter="both", use_cache=use_cache, since=since
+    )
+
+    # Then README.md (T1) drops out and src/lib/util.py is below the depth limit
+    assert {record.rel_path for record in results} == {"docs/guide.md", "src", "src/lib", "docs"}
+    assert all(record.updated_at >= parse_since(since) for record in results)
+
+
+def test_parse_since_rejects_bad_dates():
+    with pytest.raises(ValueError, match="Invalid --since"):
+        parse_since("last tuesday")
+
+
+@pytest.mark.parametrize("sort_by", ["updated_at", "-updated_at", "name", "-name", "depth", "-depth"])
+def test_top_k_collector_matches_full_sort(sort_by: str):
+    # Given records with plenty of ties
+    def make_records() -> list[StatRecord]:
+        return [
+            StatRecord(
+                "/root", os.sep.join([f"dir{i % 3}"] * (i % 4)), f"File{i % 7}.txt", T1 + (i * 37) % 11,
+                extra={"id": i}
+            )
+            for i in range(60)
+        ]
+
+    # When
+    collector = TopKCollector(5, sort_by)
+    collector.extend(make_records())
+    top = filter_and_sort_results(collector.items(), sort_by=sort_by)
+
+    # Then
+    expected = filter_and_sort_results(make_records(), sort_by=sort_by)[:5]
+    assert len(collector) == 5
+    assert [record.extra["id"] for record in top] == [record.extra["id"] for record in expected]
+    assert [record.rank for record in top] == [1, 2, 3, 4, 5]
+
+
+def test_git_mode_top(sample_repo: Path):
+    results, _ = get_last_commit_dates_optimized(
+        str(sample_repo), type_filter="files", top=2, sort_by="-updated_at"
+    )
+
+    assert [record.rel_path for record in filter_and_sort_results(results, sort_by="-updated_at")] == [
+        "docs/guide.md", "src/lib/util.py"
+    ]
+
+
+@pytest.mark.parametrize("output_format", ["ndjson", "csv"])
+@pytest.mark.parametrize("sort_by, top", [("-updated_at", None), ("name", None), ("-updated_at", 4)])
+def test_streaming_formats_match_json(workspace: Path, output_format: str, sort_by: str, top: int | None):
+    repos = [str(workspace / name) for name in ["alpha", "beta", "gamma"]]
+
+    def run(fmt: str, jobs: int) -> None:
+        process_combined(
+            str(workspace), repos, None, None, "auto", "both", None, None, None, sort_by,
+            use_cache=False, jobs=jobs, top=top, output_format=fmt
+        )
+
+    # When
+    run("json", 1)
+    expected = json.loads((workspace / "_combined_stats.json").read_text())
+    run(output_format, 2)
+    streamed = list(iter_result_file(str(workspace / f"_combined_stats.{output_format}"), output_format))
+
+    # Then
+    key_fields = ["rank", "rel_path", "updated_at", "type", "depth"]
+    assert [[item[k] for k in key_fields] for item in streamed] == [[item[k] for k in key_fields] for item in expected]
+    assert not list(workspace.glob("**/*.tmp"))
+
+
+def test_profiling_records_phases_and_git_subprocesses(sample_repo: Path):
+    # When
+    with profiling(PhaseProfiler()) as profiler:
+        process_repo(
+            str(sample_repo), None, None, "auto", "both", None, None, None, "-updated_at", use_cache=False
+        )
+
+    # Then
+    data = profiler.to_dict()
+    phases = data["phases"]
+    assert list(phases) == ["detect_repo", "ls_files", "ignored", "walk", "history", "build_results", "sort", "save"]
+    assert phases["ls_files"]["items"] == 4
+    assert phases["history"]["git_subprocesses"] >= 1
+    assert phases["save"]["bytes_written"] > 0
+    assert data["git_subprocesses"] == sum(p["git_subprocesses"] for p in phases.values())
+    assert "total" in profiler.format_table()
+
+
+def test_watcher_file_mode_updates_incrementally(tmp_path: Path):
+    # Given
+    base = tmp_path / "notes"
+    (base / "a").mkdir(parents=True)
+    (base / "a" / "one.md").write_text("one")
+    os.utime(base / "a" / "one.md", (T1, T1))
+    watcher = StatsWatcher(str(base), type_filter="both", debounce=0)
+    watcher.scan()
+    watcher.start()
+
+    # When
+    (base / "a" / "one.md").write_text("changed")
+    os.utime(base / "a" / "one.md", (T3, T3))
+    (base / "b" / "c").mkdir(parents=True)
+    (base / "b" / "c" / "two.md").write_text("two")
+    changed = watcher.poll(1.0)
+    while watcher.poll(0.2):
+        pass
+    watcher.flush()
+    watcher.inotify.close()
+
+    # Then
+    assert changed
+    results = {item["rel_path"]: item for item in json.loads((base / "_file_stats.json").read_text())}
+    assert set(results) == {"a", "a/one.md", "b", "b/c", "b/c/two.md"}
+    assert results["a"]["updated_at"] == format_macos_modified_time(T3)
+    assert results["b"]["updated_at"] == results["b/c/two.md"]["updated_at"]
+
+
+def test_watcher_git_mode_walks_new_commits_only(sample_repo: Path):
+    # Given
+    watcher = StatsWatcher(str(sample_repo), type_filter="both", use_cache=False, debounce=0)
+    watcher.scan()
+    watcher.start()
+
+    # When
+    commit_files(sample_repo, {"src/new.py": "new"}, T4, "add new")
+    git(sample_repo, "rm", "-q", "docs/guide.md")
+    git(sample_repo, "commit", "-q", "-m", "drop guide", timestamp=T4)
+    changed = False
+    while watcher.poll(1.0):
+        changed = True
+    watcher.flush()
+    watcher.inotify.close()
+
+    # Then
+    assert changed
+    results = {item["rel_path"]: item for item in json.loads((sample_repo / "_git_stats.json").read_text())}
+    assert "docs/guide.md" not in results and "docs" not in results
+    assert results["src/new.py"]["updated_at"] == format_macos_modified_time(T4)
+    assert results["src"]["updated_at"] == format_macos_modified_time(T4)
+    assert watcher.state["head"] == head_sha(sample_repo)
+
+
+def test_watcher_git_mode_keeps_newer_time_after_merging_older_branch(sample_repo: Path):
+    # Given
+    watcher = StatsWatcher(str(sample_repo), type_filter="both", use_cache=False, debounce=0)
+    watcher.scan()
+    watcher.start()
+
+    # When
+    merge_older_branch(sample_repo)
+    while watcher.poll(1.0):
+        pass
+    watcher.flush()
+    watcher.inotify.close()
+
+    # Then
+    results = {item["rel_path"]: item for item in json.loads((sample_repo / "_git_stats.json").read_text())}
+    assert results["docs/guide.md"]["updated_at"] == format_macos_modified_time(T3)
+    assert results["docs"]["updated_at"] == format_macos_modified_time(T3)
+    assert watcher.state["head"] == head_sha(sample_repo)
+
+
+def test_index_stores_scan_and_answers_newest_under_path(sample_repo: Path, tmp_path: Path):
+    # Given
+    index_file = str(tmp_path / "stats.db")
+    process_repo(
+        str(sample_repo), None, None, "auto", "both", None, None, None, "-updated_at",
+        use_cache=False, index_file=index_file
+    )
+
+    # When
+    with StatsIndex(index_file) as index:
+        newest_in_src = index.query(under=str(sample_repo / "src"), limit=2)
+        recent_files = index.query(since_ts=T2, type_filter="file")
+        everything = index.query()
+
+    # Then
+    assert [item["rel_path"] for item in newest_in_src] == ["src/lib", "src/lib/util.py"]
+    assert [item["rel_path"] for item in recent_files] == ["docs/guide.md", "src/lib/util.py"]
+    assert len(everything) == 7
+    assert all(item["repo"] == str(sample_repo) for item in everything)
+
+
+def test_index_rescan_replaces_repo_rows(sample_repo: Path, tmp_path: Path):
+    # Given
+    index_file = str(tmp_path / "stats.db")
+    process_repo(
+        str(sample_repo), None, None, "auto", "both", None, None, None, "-updated_at",
+        use_cache=False, index_file=index_file
+    )
+
+    # When
+    git(sample_repo, "rm", "-q", "docs/guide.md")
+    git(sample_repo, "commit", "-q", "-m", "drop guide", timestamp=T4)
+    process_repo(
+        str(sample_repo), None, None, "auto", "files", None, None, None, "-updated_at",
+        use_cache=False, index_file=index_file
+    )
+
+    # Then
+    with StatsIndex(index_file) as index:
+        rel_paths = {item["rel_path"] for item in index.query()}
+    assert rel_paths == {"README.md", "src/app.py", "src/lib/util.py"}
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_git_mode_churn_fields(sample_repo: Path, use_cache: bool):
+    # Given
+    (sample_repo / "src" / "app.py").write_text("print('app')\nprint('more')")
+    git(sample_repo, "add", "-A")
+    git(sample_repo, "-c", "user.email=other@example.com", "commit", "-q", "-m", "more", timestamp=T4)
+
+    # When
+    results, _ = get_last_commit_dates_optimized(
+        str(sample_repo), type_filter="both", use_cache=use_cache, show_progress=False, churn=True
+    )
+
+    # Then
+    by_path = {record.rel_path: record.to_dict() for record in results}
+    churn = lambda path: [by_path[path][k] for k in ["commits", "authors", "lines_added", "lines_removed"]]
+    assert churn("src/lib/util.py") == [2, 1, 2, 1]
+    assert churn("src/app.py") == [2, 2, 3, 1]
+    assert churn("src") == [3, 2, 5, 2]
+    assert by_path["src"]["updated_at"] == format_macos_modified_time(T4)
+
+
+def test_cached_churn_adds_new_commits_only(sample_repo: Path, tmp_path: Path):
+    # Given
+    cache_file = str(tmp_path / "churn.json")
+    get_cached_churn(str(sample_repo), head_sha(sample_repo), cache_file)
+
+    # When
+    commit_files(sample_repo, {"docs/guide.md": "guide v3\nmore"}, T4)
+    cached = get_cached_churn(str(sample_repo), head_sha(sample_repo), cache_file)
+    full = build_churn_index(str(sample_repo))
+
+    # Then
+    assert {p: s.to_fields() for p, s in cached.items()} == {p: s.to_fields() for p, s in full.items()}
+    assert {p: s.last_commit for p, s in cached.items()} == {p: s.last_commit for p, s in full.items()}
+    assert cached["docs"].commits == 3
+
+
+def test_cached_churn_keeps_newer_last_commit_after_merging_older_branch(sample_repo: Path, tmp_path: Path):
+    # Given
+    cache_file = str(tmp_path / "churn.json")
+    get_cached_churn(str(sample_repo), head_sha(sample_repo), cache_file)
+
+    # When
+    merge_older_branch(sample_repo)
+    cached = get_cached_churn(str(sample_repo), head_sha(sample_repo), cache_file)
+    full = build_churn_index(str(sample_repo))
+
+    # Then
+    assert {p: s.last_commit for p, s in cached.items()} == {p: s.last_commit for p, s in full.items()}
+    assert cached["docs/guide.md"].last_commit == T3
+    assert cached["docs/guide.md"].commits == 4
+
+
+def test_find_git_repos_prunes_excluded_dirs_and_depth(tmp_path: Path):
+    # Given
+    init_repo(tmp_path / "a")
+    init_repo(tmp_path / "deep" / "er" / "b")
+    init_repo(tmp_path / "node_modules" / "pkg")
+    init_repo(tmp_path / "a" / "nested")
+    (tmp_path / "c" / ".git").mkdir(parents=True)  # no HEAD: not a repo
+
+    # When / Then
+    assert find_git_repos(str(tmp_path)) == [str(tmp_path / "a"), str(tmp_path / "deep" / "er" / "b")]
+    assert find_git_repos(str(tmp_path), max_depth=2) == [str(tmp_path / "a")]
+    assert find_git_repos(str(tmp_path), max_depth=1) == [str(tmp_path / "a")]
+    assert find_git_repos(str(tmp_path), max_depth=0) == []
+    assert find_git_repos(str(tmp_path / "a"), max_depth=0) == [str(tmp_path / "a")]
+
+
+def test_check_is_git_repo_needs_a_commit(sample_repo: Path, tmp_path: Path):
+    # Given
+    empty = init_repo(tmp_path / "empty")
+    git(sample_repo, "pack-refs", "--all")
+
+    # When / Then
+    assert check_is_git_repo(str(sample_repo / "src" / "lib"))
+    assert not check_is_git_repo(str(empty))
+    assert not check_is_git_repo(str(tmp_path))
+
+
+def test_git_mode_line_age_histograms(sample_repo: Path):
+    # Given
+    (sample_repo / "src" / "new.py").write_text("x = 1\ny = 2\n")
+    git(sample_repo, "add", "-A")
+    git(sample_repo, "commit", "-q", "-m", "recent", timestamp=int(datetime.now().timestamp()) - 86400)
+
+    # When
+    results, _ = get_last_commit_dates_optimized(
+        str(sample_repo), extensions=[".py"], type_filter="both", use_cache=False, show_progress=False,
+        line_age=parse_age_buckets("30,365")
+    )
+
+    # Then
+    by_path = {record.rel_path: record.to_dict() for record in results}
+    assert "README.md" not in by_path
+    assert [by_path["src/new.py"][k] for k in ["age_0_30d", "age_30_365d", "age_365d_plus"]] == [2, 0, 0]
+    assert [by_path["src"][k] for k in ["age_0_30d", "age_30_365d", "age_365d_plus"]] == [2, 0, 2]
+    assert by_path["docs"]["age_365d_plus"] == 0  # guide.md is not a selected file
+
+
+def test_line_times_cached_per_path_and_blob(sample_repo: Path, tmp_path: Path, mocker):
+    # Given
+    cache_file = str(tmp_path / "blame.json")
+    head = head_sha(sample_repo)
+    first = get_line_times(str(sample_repo), head, ["README.md", "src/app.py"], cache_file=cache_file)
+    blame = mocker.patch("git_stats.blame_line_times")
+
+    # When
+    second = get_line_times(str(sample_repo), head, ["README.md", "src/app.py"], cache_file=cache_file)
+
+    # Then
+    assert second == first == {"README.md": {T1: 1}, "src/app.py": {T1: 1}}
+    blame.assert_not_called()
+
+
+def test_line_times_blame_each_path_with_same_content(tmp_path: Path):
+    # Given old.txt from T1 copied unchanged to new.txt at T4
+    repo = init_repo(tmp_path / "copy")
+    commit_files(repo, {"old.txt": "a\nb\nc\n"}, T1)
+    commit_files(repo, {"new.txt": "a\nb\nc\n"}, T4)
+
+    # When
+    times = get_line_times(str(repo), head_sha(repo), ["old.txt", "new.txt"], cache_file=str(tmp_path / "blame.json"))
+
+    # Then
+    assert times == {"old.txt": {T1: 3}, "new.txt": {T4: 3}}
+
+
+def test_parse_age_buckets_rejects_bad_edges():
+    with pytest.raises(ValueError):
+        parse_age_buckets("0,30")
+    assert parse_age_buckets("365, 30") == [30, 365]
+
+
+def test_stat_record_to_dict_matches_result_layout():
+    # Given
+    record = StatRecord("/repo", sys.intern(os.path.join("src", "lib")), "util.py", T2, matched_pattern="*.py")
+    record.rank = 3
+
+    # When
+    item = record.to_dict()
+
+    # Then
+    assert item == {
+        "basename": "util.py",
+        "updated_at": format_macos_modified_time(T2),
+        "type": "file",
+        "rel_path": os.path.join("src", "lib", "util.py"),
+        "path": os.path.join("/repo", "src", "lib", "util.py"),
+        "depth": 3,
+        "matched_pattern": "*.py",
+        "rank": 3,
+    }
+    assert not hasattr(record, "__dict__")
+
+
+def test_import_does_not_load_heavy_dependencies():
+    # When
+    code = "import sys, git_stats; print(sorted(m for m in ('git', 'tqdm', 'jet', 'sqlite3') if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+
+    # Then
+    assert output.strip() == "[]"